@@ -0,0 +1,34 @@
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'packages_indexes'
+down_revision = 'init_package_types'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Список посылок сессии с сортировкой по дате создания и keyset-пагинацией
+    op.create_index(
+        'ix_packages_session_id_created_at_id',
+        'packages',
+        ['session_id', 'created_at', 'id']
+    )
+    # Список посылок сессии с фильтром по типу
+    op.create_index(
+        'ix_packages_session_id_package_type_id',
+        'packages',
+        ['session_id', 'package_type_id']
+    )
+    # Очередь расчета стоимости доставки (delivery_cost_rub IS NULL AND id > :last_id)
+    op.create_index(
+        'ix_packages_delivery_cost_rub_id',
+        'packages',
+        ['delivery_cost_rub', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_packages_delivery_cost_rub_id', table_name='packages')
+    op.drop_index('ix_packages_session_id_package_type_id', table_name='packages')
+    op.drop_index('ix_packages_session_id_created_at_id', table_name='packages')
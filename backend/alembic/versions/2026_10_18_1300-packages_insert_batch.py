@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'packages_insert_batch'
+down_revision = 'packages_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Токен многострочной вставки: по нему create_packages выбирает ID созданных посылок
+    op.add_column('packages', sa.Column('insert_batch', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('packages', 'insert_batch')
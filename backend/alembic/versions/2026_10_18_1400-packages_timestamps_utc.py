@@ -0,0 +1,45 @@
+"""
+Перевод created_at/updated_at существующих посылок в UTC.
+
+До этой версии время посылок записывал MySQL (NOW() часового пояса сессии), теперь его задает
+приложение в UTC (app.utils.utc_now). Без перевода старые и новые посылки перемешиваются
+в сортировке created_at DESC и в курсорах списка.
+
+Порядок выката: миграция выполняется до запуска новой версии приложения, с тем же часовым поясом
+сессии MySQL, что и у старой версии (по умолчанию — часовой пояс сервера). Смещение берется
+на момент миграции, поэтому для пояса с переходом на летнее время записи другого сезона
+сдвигаются на час неточно. Если сервер MySQL работает в UTC, миграция ничего не меняет.
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = 'packages_timestamps_utc'
+down_revision = 'packages_insert_batch'
+branch_labels = None
+depends_on = None
+
+
+def _shift_timestamps(sign: int) -> None:
+    bind = op.get_bind()
+    offset_seconds = bind.execute(text('SELECT TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW())')).scalar()
+    if not offset_seconds:
+        return
+
+    bind.execute(
+        text(
+            'UPDATE packages SET '
+            'created_at = created_at + INTERVAL :shift SECOND, '
+            'updated_at = updated_at + INTERVAL :shift SECOND'
+        ),
+        {'shift': sign * offset_seconds}
+    )
+
+
+def upgrade() -> None:
+    # Местное время сессии MySQL -> UTC
+    _shift_timestamps(-1)
+
+
+def downgrade() -> None:
+    _shift_timestamps(1)
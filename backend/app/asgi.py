@@ -1,21 +1,47 @@
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from .business import CurrencyService, PackageTypeRegistry
 from .configure import configure
-from .core import openapi
+from .core import openapi, Cache
+from .core.celery_client import CeleryTaskGateway
+from .core.events import EventBus
+from .core.database.engine import dispose_engines, warm_up_engine
+from .core.rabbitmq_service import RabbitMQService
 from .endpoints import router
 from .middleware import middleware
 from .settings import DEBUG_MODE, URL_PREFIX
 
 configure()
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
+    try:
+        await warm_up_engine()
+    except Exception as e:
+        logger.error(f"Не удалось прогреть пул соединений БД: {e}")
+
+    try:
+        await PackageTypeRegistry().load()
+    except Exception as e:
+        # Справочник загрузится при первом обращении
+        logger.error(f"Не удалось загрузить справочник типов посылок: {e}")
+
     yield
 
+    await RabbitMQService().close()
+    CeleryTaskGateway().close()
+    await EventBus().close()
+    await CurrencyService().close()
+    await Cache().close()
+    await dispose_engines()
+
 
 app = FastAPI(
     debug=DEBUG_MODE,
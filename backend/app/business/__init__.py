@@ -1,2 +1,4 @@
+from .package_type_registry import PackageTypeRegistry
 from .package_service import PackageService
 from .currency_service import CurrencyService
+from .package_registration_consumer import PackageRegistrationConsumer
@@ -1,57 +1,227 @@
+import asyncio
 import logging
+import time
 import httpx
-from typing import Optional
+from typing import Optional, Any, Dict, Tuple
 from app.core.cache import Cache
+from app.core.celery_client import CeleryTaskGateway
+from app.core.metrics import CURRENCY_UPSTREAM_REQUESTS_TOTAL, CURRENCY_UPSTREAM_SECONDS
+from app.settings import CBR_API_URL
 from app.utils import Singleton
 
 logger = logging.getLogger(__name__)
 
 
 class CurrencyService(metaclass=Singleton):
-    """Сервис для работы с курсами валют"""
+    """
+    Сервис для работы с курсами валют.
+    Работает в режиме stale-while-revalidate: вызывающий код сразу получает последний известный курс,
+    а обновление из API ЦБ выполняется одной фоновой задачей заранее, до истечения срока кэша.
+    Последний успешно полученный курс хранится без срока жизни, поэтому холодный старт процесса
+    или недоступность API не блокируют расчет стоимости доставки.
+    """
 
-    CBR_API_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
+    CBR_API_URL = CBR_API_URL
     CACHE_KEY = "usd_to_rub_rate"
+    LAST_GOOD_CACHE_KEY = "usd_to_rub_rate:last_good"
+    REFRESH_LOCK_KEY = "usd_to_rub_rate:refresh_lock"
+    REPRICE_RATE_KEY = "usd_to_rub_rate:reprice"
+    REPRICE_LOCK_KEY = "usd_to_rub_rate:reprice_lock"
+    REPRICE_TASK_NAME = "reprice_delivery_costs"
     CACHE_EXPIRE_SECONDS = 3600  # 1 час
+    REFRESH_AHEAD_SECONDS = 3000  # обновляем курс за 10 минут до истечения кэша
+    REFRESH_RETRY_SECONDS = 30  # не чаще одной попытки обновления за этот период
+    LOCK_WAIT_SECONDS = 5.0  # сколько ждать курс, который получает другой процесс
+    LOCK_WAIT_INTERVAL_SECONDS = 0.1
+    HTTP_TIMEOUT_SECONDS = 10.0
+
+    def __init__(self):
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._next_refresh_at = 0.0
+        self._last_entry: Optional[Dict[str, float]] = None
 
     async def get_usd_to_rub_rate(self) -> Optional[float]:
         """Получает курс доллара к рублю."""
 
-        # Пытаемся получить из кэша
-        cached_rate = await Cache().get(self.CACHE_KEY)
-        if cached_rate:
-            logger.debug(f"Получен курс из кэша: {cached_rate}")
-            return float(cached_rate)
+        entry = await Cache().get(self.CACHE_KEY)
+        if entry is None:
+            # Свежего курса нет: берем последний успешный, одновременные промахи ждут одну загрузку
+            entry = await Cache().get_or_set(self.LAST_GOOD_CACHE_KEY, self._load_last_good_entry)
+            if entry is None:
+                logger.error("Не удалось получить курс валют")
+                return None
+
+        rate, fetched_at = self._parse_entry(entry)
+        self._last_entry = {"rate": rate, "fetched_at": fetched_at}
+        self._refresh_ahead(fetched_at)
+
+        logger.debug(f"Получен курс: {rate}")
+        return rate
+
+    async def _load_last_good_entry(self) -> Optional[Dict[str, float]]:
+        """
+        Загрузчик последнего успешного курса при промахе кэша: курс, известный процессу
+        (например, если Redis недоступен или ключ потерян), а при холодном старте — курс из API ЦБ.
+        Запрос к API — та же задача обновления, что и фоновая, поэтому в процессе он один.
+        """
+
+        if self._last_entry is not None:
+            return self._last_entry
+        return await asyncio.shield(self._start_refresh())
+
+    async def get_cached_usd_to_rub_rate(self) -> Optional[float]:
+        """
+        Получает курс, только если свежий курс уже есть в кэше (локальном или Redis).
+        Никогда не ждет API ЦБ и не использует устаревший курс, поэтому подходит для горячего пути.
+        """
+
+        entry = await Cache().get(self.CACHE_KEY)
+        if entry is None:
+            return None
+
+        rate, fetched_at = self._parse_entry(entry)
+        self._refresh_ahead(fetched_at)
+        return rate
 
-        # Если в кэше нет, запрашиваем из API
+    def _refresh_ahead(self, fetched_at: float):
+        """Запускает фоновое обновление, если курс скоро устареет"""
+
+        now = time.time()
+        if now - fetched_at >= self.REFRESH_AHEAD_SECONDS and now >= self._next_refresh_at:
+            self._next_refresh_at = now + self.REFRESH_RETRY_SECONDS
+            self._start_refresh(use_lock=True)
+
+    async def close(self):
+        """Останавливает фоновое обновление и закрывает HTTP-клиент"""
+
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+
+        if self._http_client:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def _start_refresh(self, use_lock: bool = False) -> asyncio.Task:
+        """Запускает обновление курса, если оно еще не выполняется в этом процессе"""
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_rate(use_lock))
+        return self._refresh_task
+
+    async def _refresh_rate(self, use_lock: bool) -> Optional[Dict[str, float]]:
+        """
+        Получает курс из API и сохраняет его в кэш.
+        С use_lock обновление выполняет только один процесс: остальные получат новый курс через кэш.
+        """
+
+        if use_lock and not await Cache().add(self.REFRESH_LOCK_KEY, 1, self.REFRESH_RETRY_SECONDS):
+            logger.debug("Курс уже обновляется другим процессом")
+            # Эту задачу может ждать и холодный старт: отдаем курс, который сохранит другой процесс
+            return await self._wait_for_cached_entry()
+
+        started_at = time.perf_counter()
         rate = await self._fetch_rate_from_api()
-        if rate:
-            # Сохраняем в кэш
-            await Cache().set(self.CACHE_KEY, rate, self.CACHE_EXPIRE_SECONDS)
-            logger.info(f"Получен новый курс из API: {rate}")
-            return rate
+        CURRENCY_UPSTREAM_SECONDS.observe(time.perf_counter() - started_at)
+        CURRENCY_UPSTREAM_REQUESTS_TOTAL.inc('success' if rate else 'error')
+
+        if not rate:
+            # Блокировку не снимаем: следующая попытка не раньше чем через REFRESH_RETRY_SECONDS
+            logger.error("Не удалось обновить курс валют, используется последний известный курс")
+            return None
+
+        previous_entry = await Cache().get(self.LAST_GOOD_CACHE_KEY)
+
+        entry = {"rate": rate, "fetched_at": time.time()}
+        await Cache().set(self.CACHE_KEY, entry, self.CACHE_EXPIRE_SECONDS)
+        await Cache().set(self.LAST_GOOD_CACHE_KEY, entry)
+        self._last_entry = entry
+
+        if use_lock:
+            await Cache().delete(self.REFRESH_LOCK_KEY)
+
+        logger.info(f"Курс USD обновлен: {rate}")
+
+        if previous_entry is not None:
+            previous_rate, previous_fetched_at = self._parse_entry(previous_entry)
+            if previous_rate != rate:
+                await self._schedule_repricing(rate, previous_fetched_at)
+
+        return entry
+
+    async def _wait_for_cached_entry(self) -> Optional[Dict[str, float]]:
+        """Ждет до LOCK_WAIT_SECONDS, пока курс появится в кэше (свежий или последний успешный)"""
+
+        deadline = time.monotonic() + self.LOCK_WAIT_SECONDS
+        while True:
+            entry = await Cache().get(self.CACHE_KEY)
+            if entry is None:
+                entry = await Cache().get(self.LAST_GOOD_CACHE_KEY)
+            if entry is not None or time.monotonic() >= deadline:
+                return entry
+            await asyncio.sleep(self.LOCK_WAIT_INTERVAL_SECONDS)
+
+    async def get_reprice_rate(self) -> Optional[float]:
+        """Курс, по которому должен идти текущий пересчет стоимости доставки"""
+        return await Cache().get(self.REPRICE_RATE_KEY)
 
-        logger.error("Не удалось получить курс валют")
-        return None
+    async def _schedule_repricing(self, rate: float, previous_fetched_at: float):
+        """
+        Запускает пересчет стоимости доставки по новому курсу, один раз на смену курса для всех процессов.
+        Смена определяется заменяемым курсом (его fetched_at) и новым курсом: процессы, одновременно
+        заменившие один и тот же курс, запускают один пересчет, а возврат к прежнему курсу
+        (A -> B -> A) — это новая смена, и она пересчитывается, даже если прошло меньше часа.
+        """
+
+        lock_key = f"{self.REPRICE_LOCK_KEY}:{previous_fetched_at}:{rate}"
+        if not await Cache().add(lock_key, 1, self.CACHE_EXPIRE_SECONDS):
+            return
+
+        # Пересчеты по прежним курсам увидят новый курс и остановятся
+        await Cache().set(self.REPRICE_RATE_KEY, rate)
+        try:
+            task_id = await CeleryTaskGateway().send_task(self.REPRICE_TASK_NAME, kwargs={"usd_rate": rate})
+            logger.info(f"Курс USD изменился, запущен пересчет стоимости доставки, ID задачи: {task_id}")
+        except Exception as e:
+            logger.error(f"Не удалось запустить пересчет стоимости доставки: {e}")
+            await Cache().delete(lock_key)
+
+    @staticmethod
+    def _parse_entry(entry: Any) -> Tuple[float, float]:
+        """Возвращает (курс, время получения); поддерживает прежний формат кэша — просто число"""
+
+        if isinstance(entry, dict):
+            return float(entry["rate"]), float(entry.get("fetched_at", 0))
+        return float(entry), 0.0
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Возвращает переиспользуемый HTTP-клиент с пулом соединений"""
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=self.HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+            )
+        return self._http_client
 
     async def _fetch_rate_from_api(self) -> Optional[float]:
         """Получает курс из API ЦБ РФ"""
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(self.CBR_API_URL)
-                response.raise_for_status()
+            response = await self._get_http_client().get(self.CBR_API_URL)
+            response.raise_for_status()
 
-                data = response.json()
-                usd_data = data.get("Valute", {}).get("USD")
+            data = response.json()
+            usd_data = data.get("Valute", {}).get("USD")
 
-                if usd_data and "Value" in usd_data:
-                    rate = float(usd_data["Value"])
-                    logger.info(f"Получен курс USD из API ЦБ: {rate}")
-                    return rate
+            if usd_data and "Value" in usd_data:
+                rate = float(usd_data["Value"])
+                logger.info(f"Получен курс USD из API ЦБ: {rate}")
+                return rate
 
-                logger.error("Не найдены данные о курсе USD в ответе API")
-                return None
+            logger.error("Не найдены данные о курсе USD в ответе API")
+            return None
 
         except httpx.RequestError as e:
             logger.error(f"Ошибка запроса к API ЦБ: {e}")
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from aio_pika.abc import AbstractIncomingMessage
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.business.package_service import PackageService
+from app.business.package_type_registry import PackageTypeRegistry
+from app.core import get_db_session_manager
+from app.core.metrics import RABBITMQ_CONSUMER_LAG_SECONDS
+from app.core.rabbitmq_service import RabbitMQService
+from app.schemas import PackageCreate
+from app.settings import (
+    RABBITMQ_CONSUMER_PREFETCH,
+    RABBITMQ_CONSUMER_BATCH_SIZE,
+    RABBITMQ_CONSUMER_BATCH_MAX_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PackageRegistrationConsumer:
+    """
+    Потребитель очереди регистрации посылок.
+    Сообщения накапливаются в пачку (до batch_size штук или max_wait_seconds), пачка валидируется,
+    посылки вставляются и оцениваются в одной транзакции, а сообщения подтверждаются только после коммита.
+    """
+
+    QUEUE_NAME = 'package_registration'
+    MESSAGE_TYPE = 'package_registration'
+
+    def __init__(
+        self,
+        batch_size: int = RABBITMQ_CONSUMER_BATCH_SIZE,
+        max_wait_seconds: float = RABBITMQ_CONSUMER_BATCH_MAX_WAIT_SECONDS,
+        prefetch_count: int = RABBITMQ_CONSUMER_PREFETCH
+    ):
+        self._batch_size = batch_size
+        self._max_wait_seconds = max_wait_seconds
+        self._prefetch_count = max(prefetch_count, batch_size)
+        self._batch: List[Tuple[Dict[str, Any], AbstractIncomingMessage]] = []
+        self._flush_lock = asyncio.Lock()
+
+    async def run(self):
+        """Подписывается на очередь и обрабатывает сообщения, пока задача не будет отменена"""
+
+        await RabbitMQService().consume_messages(
+            self.QUEUE_NAME,
+            self._on_message,
+            prefetch_count=self._prefetch_count,
+            manual_ack=True
+        )
+        logger.info(f"Потребитель {self.QUEUE_NAME} запущен, размер пачки {self._batch_size}")
+
+        while True:
+            await asyncio.sleep(self._max_wait_seconds)
+            await self._flush()
+
+    async def _on_message(self, body: Dict[str, Any], message: AbstractIncomingMessage):
+        self._batch.append((body, message))
+        if len(self._batch) >= self._batch_size:
+            await self._flush()
+
+    async def _flush(self):
+        async with self._flush_lock:
+            batch, self._batch = self._batch, []
+            if batch:
+                await self._process_batch(batch)
+
+    async def _process_batch(self, batch: List[Tuple[Dict[str, Any], AbstractIncomingMessage]]):
+        """
+        Создает посылки пачки в одной транзакции и подтверждает сообщения после коммита.
+        Если БД отклонила данные пачки (DataError, IntegrityError: значение вне диапазона столбца,
+        тип посылки удален после проверки), посылки создаются по одной, и отбрасывается только
+        сообщение, которое БД не принимает, — иначе одна строка возвращала бы всю пачку в очередь
+        бесконечно. При остальных ошибках (БД недоступна) сообщения возвращаются в очередь.
+        """
+
+        await self._observe_lag(batch)
+
+        items: List[Tuple[Tuple[PackageCreate, str], AbstractIncomingMessage]] = []
+        try:
+            package_type_ids = await PackageTypeRegistry().get_ids()
+
+            for body, message in batch:
+                item = self._parse_message(body, package_type_ids)
+                if item is None:
+                    await message.reject(requeue=False)
+                    continue
+
+                items.append((item, message))
+
+            if not items:
+                return
+
+            await self._create_packages(items)
+
+        except (DataError, IntegrityError) as e:
+            logger.warning(f"БД отклонила пачку сообщений из RabbitMQ, посылки создаются по одной: {e}")
+            await self._create_packages_one_by_one(items)
+
+        except Exception as e:
+            logger.error(f"Ошибка при обработке пачки сообщений из RabbitMQ: {e}")
+            await self._requeue(message for _, message in batch)
+
+    async def _create_packages_one_by_one(
+        self,
+        items: List[Tuple[Tuple[PackageCreate, str], AbstractIncomingMessage]]
+    ):
+        """Создает посылки по одной в отдельных транзакциях, отбрасывая сообщения, которые БД не принимает"""
+
+        for item in items:
+            try:
+                await self._create_packages([item])
+
+            except (DataError, IntegrityError) as e:
+                logger.error(f"Сообщение отброшено: БД не принимает посылку {item[0][0].name!r}: {e}")
+                await item[1].reject(requeue=False)
+
+            except Exception as e:
+                logger.error(f"Ошибка при создании посылки из RabbitMQ: {e}")
+                await self._requeue(message for _, message in items)
+                return
+
+    @staticmethod
+    async def _create_packages(items: List[Tuple[Tuple[PackageCreate, str], AbstractIncomingMessage]]):
+        """Создает посылки в одной транзакции; сообщения подтверждаются только после коммита"""
+
+        packages = [package for package, _ in items]
+
+        db_session_manager = get_db_session_manager()
+        try:
+            package_ids = await PackageService().create_packages(packages, calculate_cost=True)
+            await db_session_manager.commit()
+
+        except Exception:
+            await db_session_manager.rollback()
+            raise
+
+        finally:
+            await db_session_manager.close()
+
+        for _, message in items:
+            await message.ack()
+
+        await PackageService().publish_packages_event(
+            'package_created',
+            zip(package_ids, (session_id for _, session_id in packages))
+        )
+
+        logger.info(f"Обработана пачка из RabbitMQ: создано посылок {len(package_ids)}")
+
+    @staticmethod
+    async def _requeue(messages: Iterable[AbstractIncomingMessage]):
+        """Возвращает в очередь еще не обработанные сообщения"""
+
+        for message in messages:
+            if not message.processed:
+                await message.nack(requeue=True)
+
+    async def _observe_lag(self, batch: List[Tuple[Dict[str, Any], AbstractIncomingMessage]]):
+        """Учитывает задержку между публикацией сообщений пачки и началом их обработки"""
+
+        now = time.time()
+        lags = []
+        for _, message in batch:
+            created_at = (message.headers or {}).get('created_at')
+            if isinstance(created_at, (int, float)):
+                lags.append(max(now - created_at, 0.0))
+
+        await RABBITMQ_CONSUMER_LAG_SECONDS.observe_many(lags, self.QUEUE_NAME)
+
+    def _parse_message(self, body: Dict[str, Any], package_type_ids: Set[int]) -> Optional[Tuple[PackageCreate, str]]:
+        """Валидирует сообщение; None означает, что сообщение нужно отбросить"""
+
+        if body.get('type') != self.MESSAGE_TYPE:
+            logger.warning(f"Неизвестный тип сообщения: {body.get('type')}")
+            return None
+
+        session_id = body.get('session_id')
+        if not session_id:
+            logger.error("Отсутствует session_id в сообщении")
+            return None
+
+        try:
+            package_data = PackageCreate(**body.get('package_data', {}))
+        except ValidationError as e:
+            logger.error(f"Невалидные данные посылки в сообщении: {e}")
+            return None
+
+        if package_data.package_type_id not in package_type_ids:
+            logger.error(f"Тип посылки с ID {package_data.package_type_id} не найден")
+            return None
+
+        return package_data, session_id
@@ -1,14 +1,23 @@
 import logging
-from typing import Optional, Tuple, Sequence
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple, Sequence, List, Dict, Iterable
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, update, insert, case, or_, and_, Row, Select
 
 from app.business.currency_service import CurrencyService
-from app.core import get_db_session_manager
-from app.models import Package, PackageType
+from app.business.package_type_registry import PackageTypeRegistry
+from app.core import get_db_session_manager, Cache
+from app.core.events import EventBus
+from app.models import Package
 from app.schemas import PackageCreate, PackageFilter
-from app.utils import Singleton
+from app.settings import (
+    DELIVERY_COST_BATCH_SIZE,
+    DELIVERY_COST_INLINE_PRICING,
+    DELIVERY_COST_REPRICE_CHECKPOINT_TTL_SECONDS,
+    PACKAGES_EXPORT_BATCH_SIZE,
+)
+from app.utils import Singleton, utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -16,110 +25,267 @@ logger = logging.getLogger(__name__)
 class PackageService(metaclass=Singleton):
     """Сервис для работы с посылками"""
 
-    @staticmethod
-    async def create_package(package_data: PackageCreate, session_id: str) -> Package:
-        """Создает новую посылку"""
+    # Коэффициенты формулы стоимости доставки
+    WEIGHT_RATE = 0.5
+    CONTENT_COST_RATE = 0.01
+
+    # Поля посылки в ответах API (списки, детали, экспорт)
+    RESPONSE_COLUMNS = (
+        'id',
+        'name',
+        'weight',
+        'package_type_id',
+        'content_cost_usd',
+        'delivery_cost_rub',
+        'transport_company_id',
+        'created_at',
+        'updated_at',
+    )
+
+    async def create_package(self, package_data: PackageCreate, session_id: str) -> Package:
+        """
+        Создает новую посылку.
+        Если включен DELIVERY_COST_INLINE_PRICING и свежий курс есть в кэше, стоимость доставки
+        рассчитывается сразу; иначе посылку оценит периодическая задача.
+        Посылка создается одним INSERT без flush/refresh сессии: created_at задается приложением,
+        ID берется из ответа на INSERT, поэтому возвращаемый объект не привязан к сессии.
+        """
         db_session_manager = get_db_session_manager()
         session = db_session_manager.session
 
-        # Проверяем существование типа посылки
-        package_type = await session.get(PackageType, package_data.package_type_id)
-        if not package_type:
+        # Проверяем существование типа посылки по справочнику, без запроса к БД
+        if await PackageTypeRegistry().get_unknown_ids([package_data.package_type_id]):
             raise ValueError(f"Тип посылки с ID {package_data.package_type_id} не найден")
 
-        # Создаем посылку
-        package = Package(
-            name=package_data.name,
-            weight=package_data.weight,
-            package_type_id=package_data.package_type_id,
-            content_cost_usd=package_data.content_cost_usd,
-            session_id=session_id
-        )
-
-        session.add(package)
-        await db_session_manager.flush()
+        usd_rate = await self._get_inline_usd_rate()
+
+        values = {
+            'name': package_data.name,
+            'weight': package_data.weight,
+            'package_type_id': package_data.package_type_id,
+            'content_cost_usd': package_data.content_cost_usd,
+            'delivery_cost_rub': (
+                self.compute_delivery_cost(package_data.weight, package_data.content_cost_usd, usd_rate)
+                if usd_rate else None
+            ),
+            'session_id': session_id,
+            'created_at': utc_now(),
+        }
 
-        await session.refresh(package)
+        # Создаем посылку
+        result = await session.execute(insert(Package.__table__).values(values))
+        package = Package(id=result.lastrowid, updated_at=None, **values)
 
         logger.info(f"Создана посылка ID {package.id} для сессии {session_id}")
         return package
 
-    @staticmethod
-    async def get_package_types() -> Sequence[PackageType]:
-        """Получает все типы посылок"""
+    async def create_packages(
+        self,
+        packages: Sequence[Tuple[PackageCreate, str]],
+        calculate_cost: bool = False
+    ) -> List[int]:
+        """
+        Создает посылки (данные посылки, ID сессии) одним многострочным INSERT
+        и возвращает их ID в порядке входных данных.
+        При calculate_cost стоимость доставки рассчитывается сразу, по одному запросу курса;
+        без него — только если свежий курс есть в кэше (DELIVERY_COST_INLINE_PRICING).
+        Строки пачки помечаются общим токеном insert_batch, и ID выбираются обратно по нему,
+        начиная с LAST_INSERT_ID() (первого ID вставки): при innodb_autoinc_lock_mode = 2
+        (по умолчанию в MySQL 8) ID параллельных вставок перемежаются и не образуют диапазон.
+        """
+        if not packages:
+            return []
+
         db_session_manager = get_db_session_manager()
         session = db_session_manager.session
 
-        result = (await session.scalars(
-            select(PackageType).order_by(PackageType.id)
-        )).all()
+        # Проверяем существование типов посылок по справочнику, без запроса к БД
+        unknown_type_ids = await PackageTypeRegistry().get_unknown_ids({data.package_type_id for data, _ in packages})
+        if unknown_type_ids:
+            raise ValueError(f"Типы посылок с ID {sorted(unknown_type_ids)} не найдены")
+
+        if calculate_cost:
+            usd_rate = await CurrencyService().get_usd_to_rub_rate()
+            if not usd_rate:
+                logger.warning("Не удалось получить курс валют, стоимость доставки рассчитает периодическая задача")
+        else:
+            usd_rate = await self._get_inline_usd_rate()
+
+        created_at = utc_now()
+        insert_batch = uuid.uuid4().hex
+        rows = [
+            {
+                'name': data.name,
+                'weight': data.weight,
+                'package_type_id': data.package_type_id,
+                'content_cost_usd': data.content_cost_usd,
+                'delivery_cost_rub': (
+                    self.compute_delivery_cost(data.weight, data.content_cost_usd, usd_rate) if usd_rate else None
+                ),
+                'session_id': session_id,
+                'created_at': created_at,
+                'insert_batch': insert_batch,
+            }
+            for data, session_id in packages
+        ]
+
+        packages_table = Package.__table__
+        result = await session.execute(insert(packages_table).values(rows))
+
+        # ID строк одного INSERT возрастают в порядке строк, поэтому сортировка по ID дает порядок входных данных
+        package_ids = list((await session.execute(
+            select(packages_table.c.id)
+            .where(
+                packages_table.c.id >= result.lastrowid,
+                packages_table.c.insert_batch == insert_batch
+            )
+            .order_by(packages_table.c.id)
+        )).scalars())
 
-        return result
+        logger.info(f"Создано посылок: {len(package_ids)}")
+        return package_ids
 
     @staticmethod
-    async def get_user_packages(
-        session_id: str,
-        page: int = 1,
-        size: int = 20,
-        filters: Optional[PackageFilter] = None
-    ) -> Tuple[Sequence[Package], int]:
-        """Получает список посылок пользователя с пагинацией и фильтрами"""
+    async def _get_inline_usd_rate() -> Optional[float]:
+        """Курс для расчета стоимости при создании посылки: только из кэша, без ожидания API ЦБ"""
 
-        def _filter_query(sa_query, _filters):
-            if _filters.package_type_id:
-                sa_query = sa_query.where(Package.package_type_id == _filters.package_type_id)
+        if not DELIVERY_COST_INLINE_PRICING:
+            return None
+        return await CurrencyService().get_cached_usd_to_rub_rate()
 
-            if _filters.has_delivery_cost is not None:
-                if _filters.has_delivery_cost:
-                    sa_query = sa_query.where(Package.delivery_cost_rub.isnot(None))
-                else:
-                    sa_query = sa_query.where(Package.delivery_cost_rub.is_(None))
+    @staticmethod
+    def package_rows_query(session_id: str, filters: Optional[PackageFilter] = None) -> Select:
+        """
+        Запрос посылок сессии, выбирающий только поля ответа (RESPONSE_COLUMNS) по таблице, без ORM:
+        результат — легкие строки Row без identity map и отслеживания изменений.
+        Название типа посылки не выбирается: оно берется из PackageTypeRegistry.
+        """
 
+        packages_table = Package.__table__
+        query = select(*(packages_table.c[name] for name in PackageService.RESPONSE_COLUMNS)).where(
+            packages_table.c.session_id == session_id
+        )
+        return PackageService._filter_query(query, filters)
+
+    @staticmethod
+    def _filter_query(sa_query, filters: Optional[PackageFilter]):
+        """Применяет PackageFilter к запросу посылок"""
+
+        if filters is None:
             return sa_query
 
+        packages_table = Package.__table__
+
+        if filters.package_type_id:
+            sa_query = sa_query.where(packages_table.c.package_type_id == filters.package_type_id)
+
+        if filters.has_delivery_cost is not None:
+            if filters.has_delivery_cost:
+                sa_query = sa_query.where(packages_table.c.delivery_cost_rub.isnot(None))
+            else:
+                sa_query = sa_query.where(packages_table.c.delivery_cost_rub.is_(None))
+
+        return sa_query
+
+    @staticmethod
+    async def get_user_packages(
+        session_id: str,
+        page: int = 1,
+        size: int = 20,
+        filters: Optional[PackageFilter] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        include_total: bool = True
+    ) -> Tuple[Sequence[Row], Optional[int]]:
+        """
+        Получает список посылок пользователя с пагинацией и фильтрами.
+        Если передан курсор (created_at, id) последней посылки предыдущей страницы,
+        используется keyset-пагинация вместо OFFSET и номер страницы игнорируется.
+        При include_total=False запрос подсчета общего количества не выполняется.
+        Посылки возвращаются строками с полями ответа (см. package_rows_query).
+        """
+
         db_session_manager = get_db_session_manager()
-        session = db_session_manager.session
+        session = db_session_manager.read_session
 
-        query = select(Package).options(selectinload(Package.package_type)).where(
-            Package.session_id == session_id
-        )
-        query = _filter_query(query, filters)
+        packages_table = Package.__table__
+        query = PackageService.package_rows_query(session_id, filters)
+
+        total = None
+        if include_total:
+            # Запрос для подсчета общего количества
+            count_query = select(func.count(packages_table.c.id)).where(packages_table.c.session_id == session_id)
+            count_query = PackageService._filter_query(count_query, filters)
 
-        # Запрос для подсчета общего количества
-        count_query = select(func.count(Package.id)).where(Package.session_id == session_id)
-        count_query = _filter_query(count_query, filters)
+            total_result = await session.execute(count_query)
+            total = total_result.scalar() or 0
 
-        total_result = await session.execute(count_query)
-        total = total_result.scalar() or 0
+        query = query.order_by(packages_table.c.created_at.desc(), packages_table.c.id.desc()).limit(size)
 
-        # Пагинация
-        offset = (page - 1) * size
-        query = query.order_by(Package.created_at.desc()).offset(offset).limit(size)
+        if cursor is not None:
+            # Keyset-пагинация: продолжаем строго после последней выданной посылки
+            cursor_created_at, cursor_id = cursor
+            query = query.where(or_(
+                packages_table.c.created_at < cursor_created_at,
+                and_(packages_table.c.created_at == cursor_created_at, packages_table.c.id < cursor_id)
+            ))
+        else:
+            # Пагинация
+            query = query.offset((page - 1) * size)
 
-        packages = (await session.scalars(
-            query
-        )).all()
+        packages = (await session.execute(query)).all()
 
         return packages, total
 
     @staticmethod
-    async def get_package_by_id(package_id: int, session_id: str) -> Optional[Package]:
-        """Получает посылку по ID для конкретной сессии пользователя"""
+    async def get_package_by_id(package_id: int, session_id: str) -> Optional[Row]:
+        """Получает посылку по ID для конкретной сессии пользователя строкой с полями ответа"""
 
         db_session_manager = get_db_session_manager()
-        session = db_session_manager.session
+        session = db_session_manager.read_session
 
-        return (await session.scalars(
-            select(Package).where(
-                Package.id == package_id,
-                Package.session_id == session_id
-            ).options(
-                selectinload(Package.package_type)
-            )
+        return (await session.execute(
+            PackageService.package_rows_query(session_id).where(Package.__table__.c.id == package_id)
         )).one_or_none()
 
     @staticmethod
-    async def calculate_delivery_cost(package: Package) -> Optional[float]:
+    async def stream_user_packages(
+        session_id: str,
+        filters: Optional[PackageFilter] = None,
+        batch_size: int = PACKAGES_EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[Row]:
+        """
+        Выдает все посылки пользователя (строки package_rows_query, новые первыми) по мере чтения.
+        Запрос читается серверным курсором пачками по batch_size строк, поэтому память
+        не зависит от числа посылок. Используется отдельная сессия чтения: сессия запроса
+        фиксируется до отправки тела ответа, а курсор должен оставаться открытым до конца выгрузки.
+        """
+
+        packages_table = Package.__table__
+        query = (
+            PackageService.package_rows_query(session_id, filters)
+            .order_by(packages_table.c.created_at.desc(), packages_table.c.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        async with get_db_session_manager().create_read_session() as session:
+            result = await session.stream(query)
+            async for row in result:
+                yield row
+
+    @classmethod
+    def compute_delivery_cost(cls, weight: float, content_cost_usd: float, usd_rate: float) -> float:
+        """Вычисляет стоимость доставки по известному курсу без обращений к БД и кэшу"""
+        return round((weight * cls.WEIGHT_RATE + content_cost_usd * cls.CONTENT_COST_RATE) * usd_rate, 2)
+
+    @classmethod
+    def delivery_cost_expression(cls, usd_rate: float):
+        """SQL-выражение стоимости доставки для set-based обновлений"""
+        return func.round(
+            (Package.weight * cls.WEIGHT_RATE + Package.content_cost_usd * cls.CONTENT_COST_RATE) * usd_rate,
+            2
+        )
+
+    async def calculate_delivery_cost(self, package: Package) -> Optional[float]:
         """
         Рассчитывает стоимость доставки для посылки
         Формула: (вес в кг * 0.5 + стоимость содержимого в долларах * 0.01) * курс доллара к рублю
@@ -129,81 +295,247 @@ class PackageService(metaclass=Singleton):
             logger.error(f"Не удалось получить курс валют для расчета доставки посылки {package.id}")
             return None
 
-        delivery_cost = (package.weight * 0.5 + package.content_cost_usd * 0.01) * usd_rate
+        delivery_cost = self.compute_delivery_cost(package.weight, package.content_cost_usd, usd_rate)
         logger.info(f"Рассчитана стоимость доставки для посылки {package.id}: {delivery_cost:.2f} руб.")
 
-        return round(delivery_cost, 2)
+        return delivery_cost
+
+    @staticmethod
+    async def set_delivery_cost(package_id: int, delivery_cost: float):
+        """Сохраняет рассчитанную стоимость доставки посылки"""
+        db_session_manager = get_db_session_manager()
+        session = db_session_manager.session
 
-    async def calculate_delivery_costs(self) -> int:
+        packages_table = Package.__table__
+        await session.execute(
+            update(packages_table)
+            .where(packages_table.c.id == package_id)
+            .values(delivery_cost_rub=delivery_cost, updated_at=utc_now())
+        )
+
+    @staticmethod
+    def _unpriced_batch_query(last_id: int, batch_size: int) -> Select:
+        """
+        Очередная пачка неоцененных посылок (id, session_id) после last_id.
+        Строки блокируются до коммита пачки (FOR UPDATE), а заблокированные другим обработчиком
+        пропускаются (SKIP LOCKED): выбранные посылки не может оценить никто другой,
+        поэтому UPDATE пачки обновляет ровно их.
+        """
+        return (
+            select(Package.id, Package.session_id)
+            .where(
+                Package.delivery_cost_rub.is_(None),
+                Package.id > last_id
+            )
+            .order_by(Package.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    @classmethod
+    def _price_batch_statement(cls, package_ids: Sequence[int], usd_rate: float):
+        """UPDATE стоимости доставки пачки посылок, еще не оцененных к моменту обновления"""
+        return (
+            update(Package)
+            .where(
+                Package.id.in_(package_ids),
+                Package.delivery_cost_rub.is_(None)
+            )
+            .values(delivery_cost_rub=cls.delivery_cost_expression(usd_rate), updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def _reprice_chunk_statement(cls, last_id: int, chunk_end_id: int, usd_rate: float):
+        """UPDATE стоимости доставки оцененных и не привязанных к компании посылок с ID в (last_id, chunk_end_id]"""
+        return (
+            update(Package)
+            .where(
+                Package.id > last_id,
+                Package.id <= chunk_end_id,
+                Package.delivery_cost_rub.isnot(None),
+                Package.transport_company_id.is_(None)
+            )
+            .values(delivery_cost_rub=cls.delivery_cost_expression(usd_rate), updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def calculate_delivery_costs(self, batch_size: int = DELIVERY_COST_BATCH_SIZE) -> int:
         """
         Обновляет стоимость доставки для всех посылок без рассчитанной стоимости.
+        Курс запрашивается один раз, посылки обходятся пачками по id (id > last_id LIMIT n),
+        каждая пачка обновляется одним UPDATE и коммитится отдельно, поэтому
+        потребление памяти не зависит от размера очереди, а прогресс не теряется при сбое.
+        Большинство посылок оценивается при создании, поэтому задача обходит только остаток
+        по индексу ix_packages_delivery_cost_rub_id, не сканируя таблицу.
+        Пачка блокируется при чтении, поэтому событие package_priced публикуется только
+        для посылок, оцененных этим вызовом, даже если параллельно работает другой обработчик.
         Возвращает количество обработанных посылок.
         """
 
         db_session_manager = get_db_session_manager()
         session = db_session_manager.session
 
-        packages = (await session.scalars(
-            select(Package).where(Package.delivery_cost_rub.is_(None))
-        )).all()
-
-        if not packages:
-            logger.info("Нет посылок для обновления стоимости доставки")
-            return 0
-
         usd_rate = await CurrencyService().get_usd_to_rub_rate()
         if not usd_rate:
             logger.error("Не удалось получить курс валют для обновления стоимости доставки")
             return 0
 
         updated_count = 0
-        for package in packages:
-            delivery_cost = await self.calculate_delivery_cost(package)
-            if delivery_cost:
-                package.delivery_cost_rub = delivery_cost
-                updated_count += 1
+        last_id = 0
+        while True:
+            rows = (await session.execute(self._unpriced_batch_query(last_id, batch_size))).all()
+
+            if not rows:
+                break
+
+            package_ids = [row.id for row in rows]
 
-        await db_session_manager.flush()
-        logger.info(f"Обновлена стоимость доставки для {updated_count} посылок")
+            result = await session.execute(self._price_batch_statement(package_ids, usd_rate))
+            await db_session_manager.commit()
+
+            if result.rowcount == len(rows):
+                await self.publish_packages_event('package_priced', rows)
+            else:
+                # Не должно случаться при блокировке пачки: не знаем, какие посылки оценены не нами
+                logger.warning(
+                    f"Обновлено {result.rowcount} из {len(rows)} посылок пачки до ID {package_ids[-1]}, "
+                    f"событие package_priced не публикуется"
+                )
+
+            updated_count += result.rowcount
+            last_id = package_ids[-1]
+            logger.debug(f"Обновлена пачка посылок до ID {last_id}")
+
+        if updated_count:
+            logger.info(f"Обновлена стоимость доставки для {updated_count} посылок")
+        else:
+            logger.info("Нет посылок для обновления стоимости доставки")
 
         return updated_count
 
     @staticmethod
-    async def assign_transport_company(package_id: int, session_id: str, company_id: int) -> bool:
+    async def get_package_id_range() -> Optional[Tuple[int, int]]:
+        """Минимальный и максимальный ID посылок (по первичному ключу); None, если посылок нет"""
+        db_session_manager = get_db_session_manager()
+        session = db_session_manager.session
+
+        min_id, max_id = (await session.execute(select(func.min(Package.id), func.max(Package.id)))).one()
+        if min_id is None:
+            return None
+        return min_id, max_id
+
+    @staticmethod
+    def split_id_range(min_id: int, max_id: int, partition_size: int) -> List[Tuple[int, int]]:
+        """Делит диапазон ID [min_id, max_id] на разделы [start_id, end_id] по partition_size ID"""
+        return [
+            (start_id, min(start_id + partition_size - 1, max_id))
+            for start_id in range(min_id, max_id + 1, partition_size)
+        ]
+
+    async def reprice_delivery_costs(
+        self,
+        usd_rate: float,
+        start_id: int,
+        end_id: int,
+        checkpoint_key: Optional[str] = None,
+        batch_size: int = DELIVERY_COST_BATCH_SIZE
+    ) -> int:
         """
-        Привязывает транспортную компанию к посылке.
-        Обеспечивает гарантию, что первая обратившаяся компания закрепит посылку используя SELECT FOR UPDATE.
+        Пересчитывает по курсу usd_rate стоимость доставки оцененных, но еще не привязанных
+        к транспортной компании посылок с ID в [start_id, end_id].
+        Диапазон обходится отрезками первичного ключа по batch_size ID: каждый отрезок — один UPDATE
+        и отдельный коммит, после которого граница отрезка сохраняется в checkpoint_key,
+        поэтому повторный запуск продолжает с места сбоя. Если пересчет запущен уже по другому курсу,
+        обход прекращается. Возвращает количество обновленных посылок.
         """
         db_session_manager = get_db_session_manager()
         session = db_session_manager.session
 
-        try:
-            package = (await session.scalars(
-                select(Package)
-                .where(
-                    Package.id == package_id,
-                    Package.session_id == session_id
-                )
-                .with_for_update(nowait=True)
-            )).one_or_none()
+        last_id = start_id - 1
+        if checkpoint_key:
+            checkpoint = await Cache().get(checkpoint_key)
+            if checkpoint is not None:
+                last_id = max(last_id, int(checkpoint))
+                logger.info(f"Пересчет диапазона {start_id}-{end_id} продолжается с ID {last_id}")
+
+        updated_count = 0
+        while last_id < end_id:
+            if await CurrencyService().get_reprice_rate() != usd_rate:
+                logger.info(f"Пересчет по курсу {usd_rate} остановлен: курс снова изменился")
+                break
+
+            chunk_end_id = min(last_id + batch_size, end_id)
+            result = await session.execute(self._reprice_chunk_statement(last_id, chunk_end_id, usd_rate))
+            await db_session_manager.commit()
+
+            updated_count += result.rowcount
+            last_id = chunk_end_id
+            if checkpoint_key:
+                await Cache().set(checkpoint_key, last_id, DELIVERY_COST_REPRICE_CHECKPOINT_TTL_SECONDS)
+
+        logger.info(f"Пересчитана стоимость доставки для {updated_count} посылок в диапазоне {start_id}-{end_id}")
+        return updated_count
+
+    @staticmethod
+    async def publish_packages_event(event_type: str, rows: Iterable[Tuple[int, str]]):
+        """Публикует одно событие со списком посылок для каждой затронутой сессии"""
 
-            if not package:
-                logger.warning(f"Посылка {package_id} не найдена для сессии {session_id}")
-                return False
+        package_ids_by_session: Dict[str, List[int]] = {}
+        for package_id, session_id in rows:
+            package_ids_by_session.setdefault(session_id, []).append(package_id)
 
-            if package.transport_company_id is not None:
-                logger.info(f"Посылка {package_id} уже привязана к компании {package.transport_company_id}")
-                return False
+        await EventBus().publish_many(
+            (session_id, event_type, {'package_ids': package_ids})
+            for session_id, package_ids in package_ids_by_session.items()
+        )
 
-            package.transport_company_id = company_id
-            await db_session_manager.flush()
+    @staticmethod
+    async def assign_transport_company(package_id: int, session_id: str, company_id: int) -> Optional[int]:
+        """
+        Привязывает транспортную компанию к посылке одним атомарным UPDATE.
+        Гарантирует, что первая обратившаяся компания закрепит посылку: COALESCE оставляет уже записанную
+        компанию, а LAST_INSERT_ID(expr) возвращает итоговое значение в ответе на тот же UPDATE.
+        Возвращает ID компании, за которой закреплена посылка (равен company_id при успехе,
+        в том числе при повторном запросе той же компании), или None, если посылка не найдена.
+        """
+        db_session_manager = get_db_session_manager()
+        session = db_session_manager.session
+
+        packages_table = Package.__table__
+        result = await session.execute(
+            update(packages_table)
+            .where(
+                packages_table.c.id == package_id,
+                packages_table.c.session_id == session_id
+            )
+            # MySQL вычисляет SET слева направо: updated_at должен видеть прежнее значение компании
+            .ordered_values(
+                (
+                    packages_table.c.updated_at,
+                    case(
+                        (packages_table.c.transport_company_id.is_(None), utc_now()),
+                        else_=packages_table.c.updated_at
+                    )
+                ),
+                (
+                    packages_table.c.transport_company_id,
+                    func.last_insert_id(func.coalesce(packages_table.c.transport_company_id, company_id))
+                ),
+            )
+        )
+
+        if result.rowcount == 0:
+            logger.warning(f"Посылка {package_id} не найдена для сессии {session_id}")
+            return None
 
+        assigned_company_id = result.lastrowid
+        if assigned_company_id != company_id:
+            logger.info(f"Посылка {package_id} уже привязана к компании {assigned_company_id}")
+        else:
             logger.info(f"Посылка {package_id} успешно привязана к транспортной компании {company_id}")
-            return True
 
-        except Exception as e:
-            logger.error(f"Ошибка при привязке транспортной компании к посылке {package_id}: {e}")
-            return False
+        return assigned_company_id
 
 
 # Глобальный экземпляр сервиса посылок
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core import Cache
+from app.core.database.engine import get_session
+from app.models import PackageType
+from app.settings import PACKAGE_TYPES_VERSION_CHECK_SECONDS
+from app.utils import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class PackageTypeRegistry(metaclass=Singleton):
+    """
+    In-process справочник типов посылок.
+    Типов немного и они почти не меняются, поэтому справочник загружается целиком (при старте
+    приложения или при первом обращении) и используется для проверки package_type_id при создании
+    посылок, для названий типов в ответах и для готового JSON /package-types/ с ETag.
+    Сигнал обновления — версия в ключе VERSION_KEY: после изменения таблицы package_types вызывается
+    bump_version(), и каждый процесс перечитывает справочник при очередной проверке версии
+    (не чаще раза в PACKAGE_TYPES_VERSION_CHECK_SECONDS).
+    """
+
+    VERSION_KEY = 'package_types:version'
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._body: bytes = b'[]'
+        self._etag: str = ''
+        self._version: Optional[str] = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        """Загружает справочник из БД и запоминает текущую версию"""
+
+        async with self._lock:
+            await self._load()
+
+    async def _load(self):
+        version = await Cache().get(self.VERSION_KEY)
+
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(PackageType.id, PackageType.name).order_by(PackageType.id)
+            )).all()
+
+        body = json.dumps(
+            [{'id': row.id, 'name': row.name} for row in rows],
+            ensure_ascii=False,
+            separators=(',', ':')
+        ).encode()
+
+        # Состояние заменяется целиком, читатели не видят частично обновленный справочник
+        self._names = {row.id: row.name for row in rows}
+        self._body = body
+        self._etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        self._version = version
+        self._loaded = True
+        self._checked_at = time.monotonic()
+
+        logger.info(f"Загружен справочник типов посылок: {len(rows)} типов, версия {version}")
+
+    async def _ensure_fresh(self):
+        """Загружает справочник при первом обращении и перечитывает его, если сменилась версия"""
+
+        if self._loaded and time.monotonic() - self._checked_at < PACKAGE_TYPES_VERSION_CHECK_SECONDS:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                await self._load()
+                return
+
+            if time.monotonic() - self._checked_at < PACKAGE_TYPES_VERSION_CHECK_SECONDS:
+                return
+
+            version = await Cache().get(self.VERSION_KEY)
+            if version != self._version:
+                await self._load()
+            else:
+                self._checked_at = time.monotonic()
+
+    async def bump_version(self):
+        """Сигнал всем процессам перечитать справочник; текущий процесс перечитывает его сразу"""
+
+        await Cache().set(self.VERSION_KEY, uuid.uuid4().hex)
+        await self.load()
+
+    async def get_names(self) -> Dict[int, str]:
+        """Названия типов посылок по ID"""
+
+        await self._ensure_fresh()
+        return self._names
+
+    async def get_ids(self) -> Set[int]:
+        """ID всех типов посылок"""
+        return set(await self.get_names())
+
+    async def get_unknown_ids(self, type_ids: Iterable[int]) -> Set[int]:
+        """ID из type_ids, которых нет в справочнике"""
+
+        names = await self.get_names()
+        return {type_id for type_id in type_ids if type_id not in names}
+
+    async def get_serialized(self) -> Tuple[bytes, str]:
+        """Готовый JSON списка типов посылок и его ETag"""
+
+        await self._ensure_fresh()
+        return self._body, self._etag
@@ -1,4 +1,8 @@
 from .check_db_connection import CheckDataBaseConnectionCommand
+from .consume_packages import ConsumePackagesCommand
+from .seed_packages import SeedPackagesCommand
 
 
 checkDBConnectionCommand = CheckDataBaseConnectionCommand()
+consumePackagesCommand = ConsumePackagesCommand()
+seedPackagesCommand = SeedPackagesCommand()
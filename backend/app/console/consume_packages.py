@@ -0,0 +1,8 @@
+from .base import ConsoleCommand
+from app.business.package_registration_consumer import PackageRegistrationConsumer
+
+
+class ConsumePackagesCommand(ConsoleCommand):
+
+    async def execute(self):
+        await PackageRegistrationConsumer().run()
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import select, text
+
+from .base import ConsoleCommand
+from app.business.package_service import PackageService
+from app.core.database.engine import get_engine
+from app.models import PackageType
+from app.utils import utc_now
+
+PROGRESS_STEP_ROWS = 1_000_000
+
+INSERT_SQL = (
+    'INSERT INTO packages '
+    '(name, weight, package_type_id, content_cost_usd, delivery_cost_rub, session_id, created_at) '
+    'VALUES (%s, %s, %s, %s, %s, %s, %s)'
+)
+
+
+class SeedPackagesCommand(ConsoleCommand):
+    """
+    Массовая генерация посылок для нагрузочного тестирования.
+    Строки генерируются пачками и вставляются многострочными INSERT (executemany драйвера
+    склеивает пачку в один запрос) в несколько соединений параллельно.
+
+    Пример:
+        seed-packages --rows 20000000 --sessions 200000 --session-skew 2 --priced-ratio 0.9 --days 730
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.args = None
+
+    def _configure(self):
+        super()._configure()
+        self.args = self._parse_args(sys.argv[1:])
+
+    @staticmethod
+    def _parse_args(argv: List[str]) -> argparse.Namespace:
+        parser = argparse.ArgumentParser(prog='seed-packages', description='Массовая генерация посылок')
+        parser.add_argument('--rows', type=int, default=10_000_000, help='Сколько посылок создать')
+        parser.add_argument('--sessions', type=int, default=100_000, help='Количество различных сессий')
+        parser.add_argument(
+            '--session-skew', type=float, default=1.0,
+            help='Перекос распределения посылок по сессиям: 1 — равномерно, больше — часть сессий получает большинство посылок'
+        )
+        parser.add_argument(
+            '--type-weights', default='',
+            help='Доли типов посылок, например "1=0.5,2=0.3,3=0.2"; по умолчанию все типы поровну'
+        )
+        parser.add_argument('--priced-ratio', type=float, default=0.8, help='Доля посылок с рассчитанной стоимостью')
+        parser.add_argument('--days', type=int, default=365, help='Разброс created_at: последние N дней')
+        parser.add_argument('--usd-rate', type=float, default=90.0, help='Курс для расчета стоимости доставки')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Строк в одном INSERT')
+        parser.add_argument('--concurrency', type=int, default=4, help='Параллельных соединений')
+        parser.add_argument('--random-seed', type=int, default=None, help='Seed генератора для воспроизводимости')
+        return parser.parse_args(argv)
+
+    async def execute(self):
+        args = self.args
+        rng = random.Random(args.random_seed)
+
+        type_weights = await self._get_type_weights(args.type_weights)
+        batches = self._generate_batches(args, rng, type_weights)
+
+        inserted = 0
+        started_at = time.perf_counter()
+
+        async def worker():
+            nonlocal inserted
+            async with get_engine().connect() as conn:
+                # Данные генерируются с уже проверенными типами, поэтому проверки ключей на время загрузки отключаем
+                await conn.execute(text('SET SESSION unique_checks = 0, foreign_key_checks = 0'))
+                for batch in batches:
+                    await conn.exec_driver_sql(INSERT_SQL, batch)
+                    await conn.commit()
+
+                    inserted += len(batch)
+                    if inserted // PROGRESS_STEP_ROWS != (inserted - len(batch)) // PROGRESS_STEP_ROWS:
+                        elapsed = time.perf_counter() - started_at
+                        print(f'Создано посылок: {inserted} из {args.rows} ({inserted / elapsed:.0f} строк/с)')
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        print(f'Готово: {inserted} посылок за {time.perf_counter() - started_at:.1f} с')
+
+    @staticmethod
+    async def _get_type_weights(spec: str) -> Dict[int, float]:
+        """Разбирает доли типов и проверяет, что такие типы существуют"""
+
+        async with get_engine().connect() as conn:
+            type_ids = set((await conn.scalars(select(PackageType.id))).all())
+
+        if not spec:
+            return {type_id: 1.0 for type_id in sorted(type_ids)}
+
+        weights = {}
+        for item in spec.split(','):
+            type_id, _, weight = item.partition('=')
+            weights[int(type_id)] = float(weight)
+
+        unknown = set(weights) - type_ids
+        if unknown:
+            raise ValueError(f'Типы посылок не найдены: {sorted(unknown)}')
+        return weights
+
+    @staticmethod
+    def _generate_batches(
+        args: argparse.Namespace,
+        rng: random.Random,
+        type_weights: Dict[int, float]
+    ) -> Iterator[List[Tuple]]:
+        """Генерирует строки пачками по batch_size"""
+
+        type_ids = list(type_weights)
+        cumulative_weights = []
+        total_weight = 0.0
+        for weight in type_weights.values():
+            total_weight += weight
+            cumulative_weights.append(total_weight)
+
+        now = utc_now()
+        spread_seconds = args.days * 86400
+
+        produced = 0
+        while produced < args.rows:
+            size = min(args.batch_size, args.rows - produced)
+            package_types = rng.choices(type_ids, cum_weights=cumulative_weights, k=size)
+            batch = []
+
+            for i, package_type_id in enumerate(package_types, start=produced):
+                weight = round(rng.uniform(0.1, 30.0), 2)
+                content_cost_usd = round(rng.uniform(1.0, 2000.0), 2)
+                delivery_cost_rub = None
+                if rng.random() < args.priced_ratio:
+                    delivery_cost_rub = PackageService.compute_delivery_cost(weight, content_cost_usd, args.usd_rate)
+
+                session_index = int(args.sessions * rng.random() ** args.session_skew)
+                created_at = now - timedelta(seconds=rng.randrange(spread_seconds or 1))
+
+                batch.append((
+                    f'Посылка {i}',
+                    weight,
+                    package_type_id,
+                    content_cost_usd,
+                    delivery_cost_rub,
+                    f'seed-{session_index:08d}',
+                    created_at,
+                ))
+
+            produced += size
+            yield batch
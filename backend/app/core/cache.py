@@ -1,68 +1,222 @@
+import asyncio
 import json
 import logging
-from typing import Optional, Any
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Any, Awaitable, Callable, Dict, Tuple
 from redis.asyncio import Redis
-from app.settings import REDIS_URL
+from app.core.metrics import CACHE_REQUESTS_TOTAL, CACHE_REDIS_SECONDS
+from app.settings import REDIS_URL, CACHE_LOCAL_MAX_SIZE, CACHE_LOCAL_TTL_SECONDS
 from app.utils import Singleton
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+class LocalCache:
+    """In-process LRU-кэш с TTL и ограничением по количеству ключей"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Получает значение, если оно есть и не устарело"""
+
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Сохраняет значение, вытесняя самые давно использованные ключи при переполнении"""
+
+        ttl = self._ttl_seconds if ttl_seconds is None else min(ttl_seconds, self._ttl_seconds)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        """Удаляет значение"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Удаляет все значения"""
+        self._data.clear()
+
 
 class Cache(metaclass=Singleton):
-    """Класс для работы с кэшом Redis"""
-    
+    """
+    Класс для работы с кэшом Redis.
+    Перед Redis может работать in-process уровень (LocalCache, включается CACHE_LOCAL_MAX_SIZE > 0).
+    Значения из локального уровня возвращаются без копирования и не должны изменяться вызывающим кодом.
+    Изменения ключей рассылаются через Redis pub/sub, и все процессы сбрасывают свои локальные копии.
+    """
+
+    INVALIDATION_CHANNEL = 'cache:invalidate'
+    RESUBSCRIBE_DELAY_SECONDS = 1
+
     def __init__(self):
         self._redis: Optional[Redis] = None
-    
-    async def _get_redis(self) -> Redis:
-        """Получает подключение к Redis"""
+        self._local: Optional[LocalCache] = None
+        if CACHE_LOCAL_MAX_SIZE > 0:
+            self._local = LocalCache(CACHE_LOCAL_MAX_SIZE, CACHE_LOCAL_TTL_SECONDS)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._instance_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self) -> Redis:
+        """
+        Подключение к Redis (создается при первом обращении).
+        Для прямых команд и pub/sub в обход кэша: события, метаданные задач, общие метрики.
+        """
 
         if self._redis is None:
             self._redis = Redis.from_url(REDIS_URL, decode_responses=True)
         return self._redis
-    
+
+    async def _get_redis(self) -> Redis:
+        """Получает подключение к Redis"""
+        return self.redis
+
     async def get(self, key: str) -> Optional[Any]:
         """Получает значение из кэша по ключу"""
 
+        if self._local is not None:
+            value = self._local.get(key, _MISSING)
+            if value is not _MISSING:
+                CACHE_REQUESTS_TOTAL.inc('local_hit')
+                return value
+            self._ensure_invalidation_listener()
+
         try:
             redis = await self._get_redis()
+            started_at = time.perf_counter()
             value = await redis.get(key)
-            if value:
-                return json.loads(value)
+            CACHE_REDIS_SECONDS.observe(time.perf_counter() - started_at, 'get')
+
+            if value is not None:
+                CACHE_REQUESTS_TOTAL.inc('hit')
+                value = json.loads(value)
+                if self._local is not None:
+                    self._local.set(key, value)
+                return value
+
+            CACHE_REQUESTS_TOTAL.inc('miss')
             return None
         except Exception as e:
+            CACHE_REQUESTS_TOTAL.inc('error')
             logger.error(f"Ошибка при получении данных из кэша для ключа {key}: {e}")
             return None
-    
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        expire_seconds: Optional[int] = None
+    ) -> Optional[Any]:
+        """
+        Получает значение из кэша, а при промахе загружает его через loader и сохраняет.
+        Одновременные промахи по одному ключу в процессе ожидают единственный вызов loader.
+        None от loader не кэшируется.
+        """
+
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, expire_seconds)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Помечаем исключение полученным, даже если других ожидающих не было
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
     async def set(self, key: str, value: Any, expire_seconds: Optional[int] = None) -> bool:
         """Сохраняет значение в кэш"""
 
         try:
             redis = await self._get_redis()
             json_value = json.dumps(value, ensure_ascii=False)
-            
+
+            started_at = time.perf_counter()
             if expire_seconds:
                 await redis.setex(key, expire_seconds, json_value)
             else:
                 await redis.set(key, json_value)
-            
+            CACHE_REDIS_SECONDS.observe(time.perf_counter() - started_at, 'set')
+
+            if self._local is not None:
+                self._local.set(key, value, expire_seconds)
+                await self._publish_invalidation(key)
+
             logger.debug(f"Данные сохранены в кэш для ключа {key}")
             return True
         except Exception as e:
             logger.error(f"Ошибка при сохранении данных в кэш для ключа {key}: {e}")
             return False
-    
+
+    async def add(self, key: str, value: Any, expire_seconds: Optional[int] = None) -> bool:
+        """
+        Сохраняет значение, только если ключа еще нет (SET NX). Подходит для распределенных блокировок,
+        поэтому работает только с Redis, минуя in-process уровень.
+        """
+
+        try:
+            redis = await self._get_redis()
+            json_value = json.dumps(value, ensure_ascii=False)
+            return bool(await redis.set(key, json_value, ex=expire_seconds, nx=True))
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении данных в кэш для ключа {key}: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """Удаляет значение из кэша"""
 
         try:
+            if self._local is not None:
+                self._local.delete(key)
+
             redis = await self._get_redis()
             result = await redis.delete(key)
+
+            if self._local is not None:
+                await self._publish_invalidation(key)
+
             return result > 0
         except Exception as e:
             logger.error(f"Ошибка при удалении данных из кэша для ключа {key}: {e}")
             return False
-    
+
     async def exists(self, key: str) -> bool:
         """Проверяет существование ключа в кэше"""
 
@@ -73,9 +227,50 @@ class Cache(metaclass=Singleton):
         except Exception as e:
             logger.error(f"Ошибка при проверке существования ключа {key}: {e}")
             return False
-    
+
     async def close(self):
 
         """Закрывает подключение к Redis"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
         if self._redis:
             await self._redis.close()
+
+    async def _publish_invalidation(self, key: str):
+        """Сообщает остальным процессам, что локальные копии ключа устарели"""
+
+        redis = await self._get_redis()
+        await redis.publish(
+            self.INVALIDATION_CHANNEL,
+            json.dumps({'key': key, 'origin': self._instance_id})
+        )
+
+    def _ensure_invalidation_listener(self):
+        """Запускает фоновую подписку на инвалидации, если она еще не работает"""
+
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.get_running_loop().create_task(self._listen_invalidations())
+
+    async def _listen_invalidations(self):
+        """Сбрасывает локальные копии ключей, измененных другими процессами"""
+
+        while True:
+            try:
+                redis = await self._get_redis()
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                    # Пока подписки не было, инвалидации могли быть пропущены
+                    self._local.clear()
+
+                    async for message in pubsub.listen():
+                        payload = json.loads(message['data'])
+                        if payload.get('origin') != self._instance_id:
+                            self._local.delete(payload['key'])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка подписки на инвалидации кэша: {e}")
+                self._local.clear()
+                await asyncio.sleep(self.RESUBSCRIBE_DELAY_SECONDS)
@@ -1,5 +1,16 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional, Sequence
+
 from celery import Celery
-from app.settings import REDIS_URL
+from app.core.cache import Cache
+from app.settings import REDIS_URL, CELERY_CLIENT_MAX_WORKERS
+from app.utils import Singleton
+
+logger = logging.getLogger(__name__)
 
 # Создаем отдельный экземпляр Celery для использования в backend
 # Этот экземпляр используется только для отправки задач, не для их выполнения
@@ -15,6 +26,87 @@ backend_celery_app.conf.update(
     task_routes={
         'manual_calculate_delivery_costs': {'queue': 'main.tasks'},
         'calculate_delivery_costs': {'queue': 'main.tasks'},
+        'reprice_delivery_costs': {'queue': 'main.tasks'},
     },
     task_default_queue='main.tasks',
 )
+
+
+class CeleryTaskGateway(metaclass=Singleton):
+    """
+    Асинхронный шлюз к Celery для обработчиков запросов.
+    Отправка задачи — синхронный вызов kombu, поэтому выполняется в ограниченном пуле потоков
+    и не блокирует event loop. Статусы читаются напрямую из result backend через redis.asyncio,
+    статусы многих задач — одним MGET.
+    """
+
+    RESULT_KEY_PREFIX = 'celery-task-meta-'
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=CELERY_CLIENT_MAX_WORKERS,
+                thread_name_prefix='celery-client'
+            )
+        return self._executor
+
+    async def send_task(
+        self,
+        name: str,
+        args: Optional[Sequence[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        **options
+    ) -> str:
+        """Отправляет задачу в брокер и возвращает ее ID"""
+
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(),
+            partial(backend_celery_app.send_task, name, args=args, kwargs=kwargs, **options)
+        )
+        return result.id
+
+    async def get_task_meta(self, task_id: str) -> Dict[str, Any]:
+        """Получает метаданные результата задачи"""
+        return (await self.get_tasks_meta([task_id]))[task_id]
+
+    async def get_tasks_meta(self, task_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Получает метаданные результатов нескольких задач одним запросом к Redis.
+        Для задач без сохраненного результата возвращается статус PENDING, как в AsyncResult.
+        """
+
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return {}
+
+        redis = Cache().redis
+        values = await redis.mget([f'{self.RESULT_KEY_PREFIX}{task_id}' for task_id in task_ids])
+
+        tasks_meta = {}
+        for task_id, value in zip(task_ids, values):
+            if value is None:
+                tasks_meta[task_id] = {'task_id': task_id, 'status': 'PENDING', 'result': None}
+            else:
+                tasks_meta[task_id] = json.loads(value)
+        return tasks_meta
+
+    @staticmethod
+    def format_error(result: Any) -> str:
+        """Текст ошибки из результата неуспешной задачи (исключение сериализуется в JSON словарем)"""
+
+        if isinstance(result, dict) and 'exc_type' in result:
+            message = result.get('exc_message')
+            if isinstance(message, (list, tuple)):
+                return ', '.join(str(item) for item in message)
+            return str(message)
+        return str(result)
+
+    def close(self):
+        """Останавливает пул потоков отправки задач"""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -1,21 +1,136 @@
+import logging
+import time
+from contextlib import AsyncExitStack
 from functools import lru_cache
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from itertools import cycle
+from typing import Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import DB_QUERIES_TOTAL, DB_QUERY_SECONDS, DB_POOL_CHECKOUT_SECONDS, get_request_metrics
+
+from app.settings import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий время ожидания свободного соединения"""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started_at)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started_at
+    DB_QUERIES_TOTAL.inc()
+    DB_QUERY_SECONDS.observe(elapsed)
+
+    request_metrics = get_request_metrics()
+    if request_metrics is not None:
+        request_metrics.db_queries += 1
+        request_metrics.db_seconds += elapsed
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS:
+        # MySQL прерывает SELECT, выполняющиеся дольше max_execution_time
+        connect_args['init_command'] = f'SET SESSION max_execution_time={DB_STATEMENT_TIMEOUT_MS}'
+
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    return engine
 
-from app.settings import DATABASE_URL
 
 @lru_cache()
-def get_engine():
+def get_engine() -> AsyncEngine:
     """Создает и кэширует асинхронный движок SQLAlchemy"""
-    return create_async_engine(DATABASE_URL)
+    return _create_engine(DATABASE_URL)
 
-def get_session() -> AsyncSession:
-    """Создает новую асинхронную сессию"""
-    engine = get_engine()
-    async_session = async_sessionmaker(
+
+@lru_cache()
+def get_replica_engines() -> Tuple[AsyncEngine, ...]:
+    """Создает и кэширует движки реплик для чтения; пустой кортеж, если реплики не настроены"""
+    return tuple(_create_engine(url) for url in DATABASE_REPLICA_URLS)
+
+
+def _create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
         engine,
         class_=AsyncSession,
         expire_on_commit=False,
         autoflush=False,
         autocommit=False
     )
-    return async_session()
+
+
+@lru_cache()
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Создает и кэширует фабрику асинхронных сессий"""
+    return _create_sessionmaker(get_engine())
+
+
+@lru_cache()
+def _get_replica_sessionmakers():
+    """Бесконечный round-robin по фабрикам сессий реплик"""
+    return cycle([_create_sessionmaker(engine) for engine in get_replica_engines()])
+
+
+def get_session() -> AsyncSession:
+    """Создает новую асинхронную сессию"""
+    return get_sessionmaker()()
+
+
+def get_replica_session() -> Optional[AsyncSession]:
+    """Создает сессию очередной реплики для чтения; None, если реплики не настроены"""
+    if not DATABASE_REPLICA_URLS:
+        return None
+    return next(_get_replica_sessionmakers())()
+
+
+async def warm_up_engine(connections: int = DB_POOL_SIZE):
+    """Заранее открывает соединения пула, чтобы первые запросы после деплоя не ждали подключения"""
+
+    for engine in (get_engine(), *get_replica_engines()):
+        async with AsyncExitStack() as stack:
+            for _ in range(connections):
+                conn = await stack.enter_async_context(engine.connect())
+                await conn.execute(text('SELECT 1'))
+
+    logger.info(f"Пул соединений БД прогрет: {connections} соединений")
+
+
+async def dispose_engines():
+    """Закрывает пулы соединений основной БД и реплик"""
+    for engine in (get_engine(), *get_replica_engines()):
+        await engine.dispose()
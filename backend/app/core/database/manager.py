@@ -1,15 +1,18 @@
 import logging
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .engine import get_session
+from .engine import get_session, get_replica_session
 
 logger = logging.getLogger(__name__)
 
 # Контекстная переменная для хранения сессии БД для каждого пользователя/запроса
 _db_session: ContextVar[Optional[AsyncSession]] = ContextVar('db_session', default=None)
+# Сессия реплики для чтения и признак того, что чтения текущего контекста можно направлять на реплику
+_db_read_session: ContextVar[Optional[AsyncSession]] = ContextVar('db_read_session', default=None)
+_db_use_replica: ContextVar[bool] = ContextVar('db_use_replica', default=False)
 
 
 class DBSessionManager:
@@ -29,13 +32,62 @@ class DBSessionManager:
             logger.debug("Создана новая сессия БД")
         return session
 
+    @property
+    def read_session(self) -> AsyncSession:
+        """
+        Получает сессию для запросов только на чтение.
+        Сессия реплики выдается, если чтение с реплики разрешено для текущего контекста (use_replica),
+        реплики настроены и основная сессия еще не открывалась: после записи в том же контексте
+        чтения идут в основную БД, чтобы видеть собственные изменения.
+        """
+
+        if not _db_use_replica.get() or _db_session.get() is not None:
+            return self.session
+
+        session = _db_read_session.get()
+        if session is None:
+            session = get_replica_session()
+            if session is None:
+                return self.session
+            _db_read_session.set(session)
+            logger.debug("Создана новая сессия реплики БД")
+        return session
+
+    @staticmethod
+    def create_read_session() -> AsyncSession:
+        """
+        Создает отдельную сессию для долгого чтения (например, потоковой выгрузки), не связанную
+        с сессией контекста: ее транзакция не фиксируется и не откатывается вместе с запросом.
+        Реплика выбирается по тем же правилам, что и для read_session. Закрывает сессию вызывающий код.
+        """
+
+        if _db_use_replica.get() and _db_session.get() is None:
+            session = get_replica_session()
+            if session is not None:
+                return session
+        return get_session()
+
+    @staticmethod
+    def use_replica(enabled: bool = True) -> Token:
+        """Разрешает или запрещает чтение с реплики в текущем контексте; возвращает токен для reset_replica"""
+        return _db_use_replica.set(enabled)
+
+    @staticmethod
+    def reset_replica(token: Token):
+        """Восстанавливает маршрутизацию чтений, действовавшую до use_replica"""
+        _db_use_replica.reset(token)
+
+    @staticmethod
+    def has_session() -> bool:
+        """Проверяет, была ли открыта сессия БД в текущем контексте"""
+        return _db_session.get() is not None
+
     async def commit(self):
         """Подтверждает транзакцию и сохраняет изменения в БД"""
         session = _db_session.get()
         if session:
             try:
-                await session.flush()  # Отправляем изменения в БД
-                await session.commit()  # Подтверждаем транзакцию
+                await session.commit()  # commit сам отправляет несохраненные изменения
                 logger.debug("Транзакция подтверждена")
             except Exception as e:
                 logger.error(f"Ошибка при коммите: {e}")
@@ -45,25 +97,26 @@ class DBSessionManager:
     @staticmethod
     async def rollback():
         """Откатывает транзакцию"""
-        session = _db_session.get()
-        if session:
-            try:
-                await session.rollback()
-                logger.debug("Транзакция откачена")
-            except Exception as e:
-                logger.error(f"Ошибка при откате: {e}")
+        for session in (_db_session.get(), _db_read_session.get()):
+            if session:
+                try:
+                    await session.rollback()
+                    logger.debug("Транзакция откачена")
+                except Exception as e:
+                    logger.error(f"Ошибка при откате: {e}")
 
     @staticmethod
     async def close():
         """Закрывает сессию"""
-        session = _db_session.get()
-        if session:
-            try:
-                await session.close()
-                _db_session.set(None)
-                logger.debug("Сессия БД закрыта")
-            except Exception as e:
-                logger.error(f"Ошибка при закрытии сессии: {e}")
+        for session_var in (_db_session, _db_read_session):
+            session = session_var.get()
+            if session:
+                try:
+                    await session.close()
+                    session_var.set(None)
+                    logger.debug("Сессия БД закрыта")
+                except Exception as e:
+                    logger.error(f"Ошибка при закрытии сессии: {e}")
 
     @staticmethod
     async def flush():
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.cache import Cache
+from app.settings import EVENTS_SUBSCRIBER_QUEUE_SIZE
+from app.utils import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus(metaclass=Singleton):
+    """
+    Шина событий сессий пользователей поверх Redis pub/sub.
+    События публикуются в канал сессии events:session:<session_id>. Процесс держит одну подписку
+    на все каналы сессий и раздает события локальным подписчикам (например, SSE-соединениям),
+    поэтому число подключений к Redis не зависит от числа клиентов.
+    """
+
+    CHANNEL_PREFIX = 'events:session:'
+    RESUBSCRIBE_DELAY_SECONDS = 1
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def publish(self, session_id: str, event_type: str, data: Dict[str, Any]):
+        """Публикует событие для сессии"""
+        await self.publish_many([(session_id, event_type, data)])
+
+    async def publish_many(self, events: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """Публикует несколько событий одним pipeline; ошибки логируются и не пробрасываются"""
+
+        try:
+            redis = Cache().redis
+            async with redis.pipeline(transaction=False) as pipe:
+                for session_id, event_type, data in events:
+                    pipe.publish(
+                        f'{self.CHANNEL_PREFIX}{session_id}',
+                        json.dumps({'type': event_type, 'data': data, 'at': time.time()}, ensure_ascii=False)
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Ошибка при публикации событий: {e}")
+
+    async def listen(self, session_id: str, idle_timeout: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Выдает события сессии по мере поступления.
+        Если событий нет дольше idle_timeout секунд, выдает None (повод отправить клиенту heartbeat).
+        События, пропущенные во время переподключения к Redis, не повторяются.
+        """
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        self._ensure_listener()
+
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            queues = self._subscribers.get(session_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[session_id]
+
+    async def close(self):
+        """Останавливает подписку процесса"""
+
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+    def _ensure_listener(self):
+        """Запускает фоновую подписку на каналы сессий, если она еще не работает"""
+
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        """Раздает события из Redis подписчикам своих сессий"""
+
+        while True:
+            try:
+                redis = Cache().redis
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.psubscribe(f'{self.CHANNEL_PREFIX}*')
+
+                    async for message in pubsub.listen():
+                        self._dispatch(message['channel'][len(self.CHANNEL_PREFIX):], message['data'])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка подписки на события сессий: {e}")
+                await asyncio.sleep(self.RESUBSCRIBE_DELAY_SECONDS)
+
+    def _dispatch(self, session_id: str, payload: str):
+        queues = self._subscribers.get(session_id)
+        if not queues:
+            return
+
+        event = json.loads(payload)
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Подписчик сессии {session_id} не успевает читать события, событие пропущено")
@@ -0,0 +1,321 @@
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from contextvars import ContextVar, Token
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LONG_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1200.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], le: Optional[str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Базовая метрика: имя, описание, имена меток и регистрация в общем реестре"""
+
+    TYPE = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+
+    @abstractmethod
+    async def render(self) -> List[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus"""
+
+
+class Counter(Metric):
+    """
+    Счетчик в памяти процесса.
+    Обновляется из потока event loop без блокировок: инкремент — одна операция со словарем.
+    """
+
+    TYPE = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        """Увеличивает счетчик для набора значений меток"""
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    async def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, value in self._values.items():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}')
+        return lines
+
+
+class BaseHistogram(Metric):
+    """
+    Общая часть гистограмм: корзины и вывод состояний.
+    Состояние набора меток — список счетчиков по корзинам (последняя — +Inf) и сумма в конце.
+    """
+
+    TYPE = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+
+    def _render_states(self, states: Dict[Tuple[str, ...], List[float]]) -> List[str]:
+        lines = self._header()
+        for labelvalues, state in states.items():
+            cumulative = 0
+            for bound, count in zip((*self._buckets, '+Inf'), state):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _format_value(bound)
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}'
+                )
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Histogram(BaseHistogram):
+    """
+    Гистограмма в памяти процесса.
+    Для каждого набора меток хранится один список, поэтому наблюдение после первого не создает
+    объектов и не требует блокировок.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames, buckets)
+        self._states: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        """Добавляет наблюдение для набора значений меток"""
+
+        state = self._states.get(labelvalues)
+        if state is None:
+            state = self._states[labelvalues] = [0] * (len(self._buckets) + 2)
+
+        state[bisect.bisect_left(self._buckets, value)] += 1
+        state[-1] += value
+
+    async def render(self) -> List[str]:
+        return self._render_states(self._states)
+
+
+class SharedHistogram(BaseHistogram):
+    """
+    Гистограмма, общая для всех процессов: наблюдения суммируются в hash Redis.
+    Используется для процессов, которые сами не обслуживают /metrics (Celery воркеры, потребитель RabbitMQ).
+    Наблюдения одного вызова observe_many агрегируются локально и отправляются одним pipeline.
+    Запись асинхронная, поэтому методы называются иначе, чем синхронный Histogram.observe.
+    """
+
+    KEY_PREFIX = 'metrics:'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LONG_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames, buckets)
+        self._key = f'{self.KEY_PREFIX}{name}'
+
+    async def observe_many(self, values: Iterable[float], *labelvalues: str):
+        """Добавляет пачку наблюдений для набора значений меток"""
+
+        counts: Dict[int, int] = {}
+        total = 0.0
+        for value in values:
+            index = bisect.bisect_left(self._buckets, value)
+            counts[index] = counts.get(index, 0) + 1
+            total += value
+
+        if not counts:
+            return
+
+        prefix = '|'.join(labelvalues)
+        try:
+            redis = self._redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for index, count in counts.items():
+                    pipe.hincrby(self._key, f'{prefix}:{index}', count)
+                pipe.hincrbyfloat(self._key, f'{prefix}:sum', total)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении метрики {self.name}: {e}")
+
+    async def observe_async(self, value: float, *labelvalues: str):
+        """Добавляет наблюдение для набора значений меток"""
+        await self.observe_many((value,), *labelvalues)
+
+    async def render(self) -> List[str]:
+        try:
+            redis = self._redis()
+            data = await redis.hgetall(self._key)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении метрики {self.name}: {e}")
+            return []
+
+        states: Dict[Tuple[str, ...], List[float]] = {}
+        for field, value in data.items():
+            prefix, _, slot = field.rpartition(':')
+            labelvalues = tuple(prefix.split('|')) if self.labelnames else ()
+            state = states.get(labelvalues)
+            if state is None:
+                state = states[labelvalues] = [0] * (len(self._buckets) + 2)
+
+            if slot == 'sum':
+                state[-1] = float(value)
+            else:
+                state[int(slot)] = int(value)
+
+        return self._render_states(states)
+
+    @staticmethod
+    def _redis():
+        # Импорт внутри метода: модуль кэша сам инструментирован метриками
+        from app.core.cache import Cache
+        return Cache().redis
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric):
+        self._metrics.append(metric)
+
+    async def render(self) -> str:
+        """Отдает все метрики в текстовом формате Prometheus"""
+
+        lines = []
+        for metric in self._metrics:
+            lines.extend(await metric.render())
+        lines.append('')
+        return '\n'.join(lines)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Статистика SQL одного HTTP-запроса, заполняется событиями движка БД"""
+
+    __slots__ = ('db_queries', 'db_seconds')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar('request_metrics', default=None)
+
+
+def start_request_metrics() -> Tuple[RequestMetrics, Token]:
+    """Начинает сбор статистики запроса в текущем контексте"""
+
+    request_metrics = RequestMetrics()
+    return request_metrics, _request_metrics.set(request_metrics)
+
+
+def finish_request_metrics(token: Token):
+    """Завершает сбор статистики запроса"""
+    _request_metrics.reset(token)
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    """Статистика текущего HTTP-запроса; None вне запроса (Celery задачи, потребитель)"""
+    return _request_metrics.get()
+
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса', ('method', 'route')
+)
+HTTP_RESPONSES_TOTAL = Counter(
+    'http_responses_total', 'Количество HTTP-ответов по статусам', ('method', 'route', 'status')
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Количество SQL-запросов на один HTTP-запрос', ('route',), COUNT_BUCKETS
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Суммарное время SQL-запросов на один HTTP-запрос', ('route',)
+)
+
+# Database
+DB_QUERIES_TOTAL = Counter('db_queries_total', 'Количество выполненных SQL-запросов')
+DB_QUERY_SECONDS = Histogram('db_query_duration_seconds', 'Время выполнения SQL-запроса')
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'db_pool_checkout_wait_seconds', 'Время ожидания соединения из пула БД'
+)
+
+# Cache
+CACHE_REQUESTS_TOTAL = Counter(
+    'cache_requests_total', 'Обращения к кэшу: local_hit, hit, miss, error', ('result',)
+)
+CACHE_REDIS_SECONDS = Histogram(
+    'cache_redis_duration_seconds', 'Время операции кэша в Redis', ('operation',)
+)
+
+# Currency
+CURRENCY_UPSTREAM_REQUESTS_TOTAL = Counter(
+    'currency_upstream_requests_total', 'Запросы курса к API ЦБ', ('result',)
+)
+CURRENCY_UPSTREAM_SECONDS = Histogram(
+    'currency_upstream_duration_seconds', 'Время запроса курса к API ЦБ'
+)
+
+# RabbitMQ
+RABBITMQ_PUBLISH_SECONDS = Histogram(
+    'rabbitmq_publish_duration_seconds', 'Время публикации сообщения: direct или buffered (до confirm)', ('mode',)
+)
+RABBITMQ_PUBLISH_ERRORS_TOTAL = Counter(
+    'rabbitmq_publish_errors_total', 'Сообщения, не подтвержденные брокером', ('mode',)
+)
+RABBITMQ_CONSUMER_LAG_SECONDS = SharedHistogram(
+    'rabbitmq_consumer_lag_seconds', 'Время от публикации сообщения до начала его обработки', ('queue',)
+)
+
+# Celery
+CELERY_TASK_SECONDS = SharedHistogram(
+    'celery_task_duration_seconds', 'Время выполнения Celery задачи', ('task', 'state')
+)
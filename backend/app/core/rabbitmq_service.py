@@ -1,27 +1,53 @@
 import json
 import logging
 import asyncio
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Set, Tuple
 import aio_pika
 from aio_pika.abc import AbstractConnection, AbstractChannel, AbstractQueue
-from app.settings import RABBITMQ_URL
+from app.core.metrics import RABBITMQ_PUBLISH_SECONDS, RABBITMQ_PUBLISH_ERRORS_TOTAL
+from app.settings import (
+    RABBITMQ_URL,
+    RABBITMQ_PUBLISH_CHANNELS,
+    RABBITMQ_PUBLISH_BATCH_SIZE,
+    RABBITMQ_PUBLISH_MAX_LATENCY_SECONDS,
+    RABBITMQ_PUBLISH_BUFFER_SIZE,
+    RABBITMQ_PUBLISH_TIMEOUT_SECONDS,
+)
 from app.utils import Singleton
 
 logger = logging.getLogger(__name__)
 
 
 class RabbitMQService(metaclass=Singleton):
-    """Сервис для работы с RabbitMQ"""
+    """
+    Сервис для работы с RabbitMQ.
+    Помимо прямой публикации (publish_message) есть высокопроизводительный путь enqueue_message:
+    сообщения копятся в ограниченном буфере и публикуются пачками через пул каналов
+    с publisher confirms, подтверждения пачки ожидаются конвейерно.
+    """
     
     def __init__(self):
         self._connection: Optional[AbstractConnection] = None
         self._channel: Optional[AbstractChannel] = None
         self._queues: Dict[str, AbstractQueue] = {}
+        self._connect_lock = asyncio.Lock()
+        self._publish_channels: List[AbstractChannel] = []
+        self._publish_channel_index = 0
+        self._publish_buffer: Optional[asyncio.Queue] = None
+        self._publisher_task: Optional[asyncio.Task] = None
+        self._publish_batch_tasks: Set[asyncio.Task] = set()
     
     async def connect(self):
         """Подключение к RabbitMQ"""
 
-        if not self._connection or self._connection.is_closed:
+        if self._connection and not self._connection.is_closed:
+            return
+
+        async with self._connect_lock:
+            if self._connection and not self._connection.is_closed:
+                return
+
             try:
                 self._connection = await aio_pika.connect_robust(
                     RABBITMQ_URL,
@@ -29,6 +55,14 @@ class RabbitMQService(metaclass=Singleton):
                 )
                 self._channel = await self._connection.channel()
                 await self._channel.set_qos(prefetch_count=10)
+
+                # Каналы робастного подключения и объявленные на них очереди восстанавливаются
+                # при переподключении автоматически, поэтому кэш очередей сбрасывается только здесь
+                self._queues = {}
+                self._publish_channels = [
+                    await self._connection.channel(publisher_confirms=True)
+                    for _ in range(RABBITMQ_PUBLISH_CHANNELS)
+                ]
                 logger.info("Подключение к RabbitMQ установлено")
             except Exception as e:
                 logger.error(f"Ошибка подключения к RabbitMQ: {e}")
@@ -37,6 +71,10 @@ class RabbitMQService(metaclass=Singleton):
     async def declare_queue(self, queue_name: str, durable: bool = True) -> AbstractQueue:
         """Объявление очереди"""
 
+        queue = self._queues.get(queue_name)
+        if queue is not None:
+            return queue
+
         await self.connect()
         
         if queue_name not in self._queues:
@@ -55,36 +93,152 @@ class RabbitMQService(metaclass=Singleton):
 
         try:
             await self.declare_queue(queue_name)
-            
-            message_body = json.dumps(message, ensure_ascii=False).encode('utf-8')
-            
+
+            started_at = time.perf_counter()
             await self._channel.default_exchange.publish(
-                aio_pika.Message(
-                    message_body,
-                    priority=priority,
-                    content_type='application/json',
-                    content_encoding='utf-8',
-                    headers={
-                        'created_at': asyncio.get_event_loop().time(),
-                        'message_type': message.get('type', 'unknown')
-                    }
-                ),
+                self._build_message(message, priority),
                 routing_key=queue_name
             )
+            RABBITMQ_PUBLISH_SECONDS.observe(time.perf_counter() - started_at, 'direct')
             
             logger.info(f"Сообщение отправлено в очередь {queue_name}: {message.get('type', 'unknown')}")
             
         except Exception as e:
+            RABBITMQ_PUBLISH_ERRORS_TOTAL.inc('direct')
             logger.error(f"Ошибка при отправке сообщения в RabbitMQ: {e}")
             raise
+
+    async def enqueue_message(self, queue_name: str, message: Dict[str, Any], priority: int = 0):
+        """
+        Отправка сообщения через буфер пакетной публикации.
+        Возвращает управление после подтверждения брокером (publisher confirm).
+        Если буфер заполнен, вызов ждет освобождения места, что ограничивает нагрузку на брокер.
+        """
+
+        self._ensure_publisher()
+
+        started_at = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._publish_buffer.put((queue_name, self._build_message(message, priority), future))
+        await future
+        RABBITMQ_PUBLISH_SECONDS.observe(time.perf_counter() - started_at, 'buffered')
+
+    def _ensure_publisher(self):
+        """Запускает фоновую задачу пакетной публикации, если она еще не работает"""
+
+        if self._publish_buffer is None:
+            self._publish_buffer = asyncio.Queue(maxsize=RABBITMQ_PUBLISH_BUFFER_SIZE)
+
+        if self._publisher_task is None or self._publisher_task.done():
+            self._publisher_task = asyncio.get_running_loop().create_task(self._run_publisher())
+
+    async def _run_publisher(self):
+        """Собирает сообщения из буфера в пачки и публикует их параллельно по каналам пула"""
+
+        in_flight = asyncio.Semaphore(RABBITMQ_PUBLISH_CHANNELS)
+
+        while True:
+            batch = [await self._publish_buffer.get()]
+
+            # Ждем добора пачки не дольше максимальной задержки
+            if self._publish_buffer.qsize() < RABBITMQ_PUBLISH_BATCH_SIZE - 1:
+                await asyncio.sleep(RABBITMQ_PUBLISH_MAX_LATENCY_SECONDS)
+
+            while len(batch) < RABBITMQ_PUBLISH_BATCH_SIZE and not self._publish_buffer.empty():
+                batch.append(self._publish_buffer.get_nowait())
+
+            await in_flight.acquire()
+            task = asyncio.get_running_loop().create_task(self._publish_batch(batch))
+            self._publish_batch_tasks.add(task)
+            task.add_done_callback(self._publish_batch_tasks.discard)
+            task.add_done_callback(lambda _: in_flight.release())
+
+    async def _publish_batch(self, batch: List[Tuple[str, aio_pika.Message, asyncio.Future]]):
+        """Публикует пачку на одном канале, ожидая все подтверждения брокера разом"""
+
+        try:
+            for queue_name in {queue_name for queue_name, _, _ in batch}:
+                await self.declare_queue(queue_name)
+
+            channel = self._next_publish_channel()
+            results = await asyncio.gather(
+                *(
+                    channel.default_exchange.publish(
+                        message, routing_key=queue_name, timeout=RABBITMQ_PUBLISH_TIMEOUT_SECONDS
+                    )
+                    for queue_name, message, _ in batch
+                ),
+                return_exceptions=True
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при отправке пачки сообщений в RabbitMQ: {e}")
+            results = [e] * len(batch)
+
+        failed = 0
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                failed += 1
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+
+        if failed:
+            RABBITMQ_PUBLISH_ERRORS_TOTAL.inc('buffered', amount=failed)
+            logger.error(f"Не подтверждено брокером сообщений: {failed} из {len(batch)}")
+        else:
+            logger.debug(f"Пачка из {len(batch)} сообщений подтверждена брокером")
+
+    def _next_publish_channel(self) -> AbstractChannel:
+        self._publish_channel_index = (self._publish_channel_index + 1) % len(self._publish_channels)
+        return self._publish_channels[self._publish_channel_index]
+
+    @staticmethod
+    def _build_message(message: Dict[str, Any], priority: int) -> aio_pika.Message:
+        return aio_pika.Message(
+            json.dumps(message, ensure_ascii=False).encode('utf-8'),
+            priority=priority,
+            content_type='application/json',
+            content_encoding='utf-8',
+            headers={
+                'created_at': time.time(),
+                'message_type': message.get('type', 'unknown')
+            }
+        )
     
-    async def consume_messages(self, queue_name: str, callback, auto_ack: bool = False):
-        """Подписка на сообщения из очереди"""
+    async def consume_messages(
+        self,
+        queue_name: str,
+        callback,
+        auto_ack: bool = False,
+        prefetch_count: Optional[int] = None,
+        manual_ack: bool = False
+    ):
+        """
+        Подписка на сообщения из очереди.
+        При manual_ack подтверждение (ack/nack/reject) выполняет сам callback,
+        что позволяет подтверждать сообщения пачками после коммита.
+        """
 
         try:
             queue = await self.declare_queue(queue_name)
-            
+
+            if prefetch_count:
+                await self._channel.set_qos(prefetch_count=prefetch_count)
+
             async def message_handler(message: aio_pika.IncomingMessage):
+                if manual_ack:
+                    try:
+                        body = json.loads(message.body.decode('utf-8'))
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Ошибка декодирования JSON: {e}")
+                        await message.reject(requeue=False)
+                        return
+
+                    await callback(body, message)
+                    return
+
                 async with message.process(requeue=True):
                     try:
                         body = json.loads(message.body.decode('utf-8'))
@@ -106,6 +260,16 @@ class RabbitMQService(metaclass=Singleton):
     
     async def close(self):
         """Закрытие подключения"""
+        if self._publisher_task:
+            self._publisher_task.cancel()
+            self._publisher_task = None
+
+        if self._publish_buffer is not None:
+            while not self._publish_buffer.empty():
+                _, _, future = self._publish_buffer.get_nowait()
+                if not future.done():
+                    future.set_exception(ConnectionError("Подключение к RabbitMQ закрыто"))
+
         if self._connection and not self._connection.is_closed:
             await self._connection.close()
             logger.info("Подключение к RabbitMQ закрыто")
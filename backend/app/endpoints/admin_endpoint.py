@@ -1,10 +1,12 @@
 import logging
-import asyncio
-from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 
-from app.core.celery_client import backend_celery_app
-from app.business.package_service import PackageService
+from app.core.celery_client import CeleryTaskGateway
+from app.settings import CELERY_TASK_STATUS_BATCH_MAX_SIZE
+from app.business.package_type_registry import PackageTypeRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -12,21 +14,25 @@ router = APIRouter(tags=["admin"])
 
 
 @router.post("/admin/calculate-delivery-costs", summary="Ручной запуск расчета стоимости доставки")
-async def manual_calculate_delivery_costs():
+async def manual_calculate_delivery_costs(request: Request):
     """
     Ручной запуск расчета стоимости доставки для всех необработанных посылок.
     Используется для отладки и тестирования.
+    По завершении задачи в поток событий сессии (/events/stream) приходит task_finished.
     """
     try:
-        # Запускаем задачу асинхронно через backend Celery client
-        task = backend_celery_app.send_task('calculate_delivery_costs_task')
+        # Отправка выполняется в пуле потоков шлюза и не блокирует event loop
+        task_id = await CeleryTaskGateway().send_task(
+            'calculate_delivery_costs',
+            kwargs={'session_id': request.state.session_id}
+        )
 
-        logger.info(f"Запущена ручная задача расчета стоимости доставки, ID: {task.id}")
+        logger.info(f"Запущена ручная задача расчета стоимости доставки, ID: {task_id}")
 
         return JSONResponse(
             content={
                 "message": "Задача расчета стоимости доставки запущена",
-                "task_id": task.id,
+                "task_id": task_id,
                 "status": "pending"
             },
             status_code=202
@@ -37,34 +43,70 @@ async def manual_calculate_delivery_costs():
         raise HTTPException(status_code=500, detail="Не удалось запустить задачу")
 
 
+def _task_status_response(task_id: str, task_meta: Dict[str, Any]) -> Dict[str, Any]:
+    status = task_meta['status']
+
+    if status == 'PENDING':
+        return {
+            'task_id': task_id,
+            'status': status,
+            'message': 'Задача ожидает выполнения'
+        }
+    elif status == 'SUCCESS':
+        return {
+            'task_id': task_id,
+            'status': status,
+            'result': task_meta.get('result')
+        }
+    else:
+        return {
+            'task_id': task_id,
+            'status': status,
+            'error': CeleryTaskGateway.format_error(task_meta.get('result'))
+        }
+
+
 @router.get("/admin/task/{task_id}", summary="Получить статус задачи")
 async def get_task_status(task_id: str):
     """Получает статус выполнения задачи по её ID."""
 
     try:
-        task_result = backend_celery_app.AsyncResult(task_id)
-
-        if task_result.state == 'PENDING':
-            response = {
-                'task_id': task_id,
-                'status': task_result.state,
-                'message': 'Задача ожидает выполнения'
-            }
-        elif task_result.state == 'SUCCESS':
-            response = {
-                'task_id': task_id,
-                'status': task_result.state,
-                'result': task_result.result
-            }
-        else:
-            response = {
-                'task_id': task_id,
-                'status': task_result.state,
-                'error': str(task_result.info)
-            }
-
-        return response
+        task_meta = await CeleryTaskGateway().get_task_meta(task_id)
+        return _task_status_response(task_id, task_meta)
 
     except Exception as e:
         logger.error(f"Ошибка при получении статуса задачи {task_id}: {e}")
         raise HTTPException(status_code=500, detail="Не удалось получить статус задачи")
+
+
+@router.get("/admin/tasks/status", summary="Получить статусы нескольких задач")
+async def get_tasks_status(
+    task_ids: list[str] = Query(min_length=1, max_length=CELERY_TASK_STATUS_BATCH_MAX_SIZE)
+):
+    """Получает статусы задач по списку ID одним запросом к result backend, в порядке запроса."""
+
+    try:
+        tasks_meta = await CeleryTaskGateway().get_tasks_meta(task_ids)
+        return {
+            'tasks': [_task_status_response(task_id, tasks_meta[task_id]) for task_id in task_ids]
+        }
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении статусов задач: {e}")
+        raise HTTPException(status_code=500, detail="Не удалось получить статусы задач")
+
+
+@router.post("/admin/package-types/refresh", summary="Перечитать справочник типов посылок")
+async def refresh_package_types():
+    """
+    Сигнал всем процессам перечитать справочник типов посылок после изменения таблицы package_types.
+    Текущий процесс перечитывает справочник сразу, остальные — при очередной проверке версии.
+    """
+
+    try:
+        await PackageTypeRegistry().bump_version()
+        return {'message': 'Справочник типов посылок будет обновлен'}
+
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении справочника типов посылок: {e}")
+        raise HTTPException(status_code=500, detail="Не удалось обновить справочник типов посылок")
@@ -0,0 +1,41 @@
+import json
+import logging
+from contextlib import aclosing
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.events import EventBus
+from app.settings import EVENTS_HEARTBEAT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["events"])
+
+
+@router.get("/events/stream", summary="Поток событий своей сессии (Server-Sent Events)")
+async def events_stream(request: Request):
+    """
+    Отдает события сессии пользователя в формате text/event-stream:
+    package_created, package_priced и task_finished. Пока событий нет,
+    раз в EVENTS_HEARTBEAT_SECONDS отправляется комментарий, чтобы прокси не закрыли соединение.
+    """
+    session_id = request.state.session_id
+
+    async def stream():
+        async with aclosing(EventBus().listen(session_id, EVENTS_HEARTBEAT_SECONDS)) as events:
+            async for event in events:
+                if event is None:
+                    yield ': ping\n\n'
+                    continue
+
+                data = json.dumps(event['data'], ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+
+    logger.debug(f"Открыт поток событий для сессии {session_id}")
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
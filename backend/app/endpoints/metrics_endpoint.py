@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter()
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics():
+    """
+        permission: None
+    """
+    return Response(await REGISTRY.render(), media_type=CONTENT_TYPE)
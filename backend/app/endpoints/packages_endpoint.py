@@ -1,7 +1,12 @@
+import csv
+import io
 import logging
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Request, Query, Depends
-from fastapi.responses import JSONResponse
+import zlib
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+from fastapi import APIRouter, HTTPException, Request, Query, Depends, Body
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic_core import to_json
 
 from app.core.rabbitmq_service import RabbitMQService
 from app.schemas import (
@@ -10,10 +15,14 @@ from app.schemas import (
     PackageResponse,
     PackageDetailResponse,
     PackageListResponse,
+    PackageBulkCreateResponse,
     PackageFilter,
     TransportCompanyAssign
 )
 from app.business.package_service import PackageService
+from app.business.package_type_registry import PackageTypeRegistry
+from app.settings import PACKAGES_BULK_MAX_SIZE, PACKAGES_EXPORT_BATCH_SIZE
+from app.utils import encode_cursor, decode_cursor, FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +37,30 @@ def get_package_filter(
     return PackageFilter(package_type_id=package_type_id, has_delivery_cost=has_delivery_cost)
 
 
+def serialize_package(package: Any, package_type_names: Dict[int, str]) -> Dict[str, Any]:
+    """
+    Посылка (строка PackageService.package_rows_query или модель Package) в форме PackageResponse
+    для FastJSONResponse. Словарь собирается напрямую, без создания и повторной валидации моделей pydantic.
+    """
+
+    package_type_name = package_type_names.get(package.package_type_id)
+    return {
+        'name': package.name,
+        'weight': package.weight,
+        'package_type_id': package.package_type_id,
+        'content_cost_usd': package.content_cost_usd,
+        'id': package.id,
+        'delivery_cost_rub': package.delivery_cost_rub,
+        'transport_company_id': package.transport_company_id,
+        'created_at': package.created_at,
+        'updated_at': package.updated_at,
+        'package_type': (
+            {'name': package_type_name, 'id': package.package_type_id}
+            if package_type_name is not None else None
+        ),
+    }
+
+
 @router.post("/packages/", response_model=PackageResponse, summary="Зарегистрировать посылку")
 async def create_package(
     package_data: PackageCreate,
@@ -61,6 +94,35 @@ async def create_package(
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
+@router.post("/packages/bulk", response_model=PackageBulkCreateResponse, summary="Зарегистрировать несколько посылок")
+async def create_packages_bulk(
+    request: Request,
+    packages_data: list[PackageCreate] = Body(min_length=1, max_length=PACKAGES_BULK_MAX_SIZE),
+    calculate_cost: bool = Query(False, description="Сразу рассчитать стоимость доставки")
+):
+    """
+    Регистрирует несколько посылок одним запросом (одним многострочным INSERT).
+    Возвращает ID созданных посылок в порядке переданных данных.
+    """
+    try:
+        session_id = request.state.session_id
+        package_ids = await PackageService().create_packages(
+            [(package_data, session_id) for package_data in packages_data],
+            calculate_cost=calculate_cost
+        )
+
+        logger.info(f"Создано посылок пакетом: {len(package_ids)} для сессии {session_id}")
+
+        return PackageBulkCreateResponse(ids=package_ids)
+
+    except ValueError as e:
+        logger.warning(f"Ошибка валидации при пакетном создании посылок: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка при пакетном создании посылок: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+
 @router.post("/packages/async", summary="Зарегистрировать посылку асинхронно")
 async def create_package_async(
     package_data: PackageCreate,
@@ -79,7 +141,8 @@ async def create_package_async(
             "session_id": session_id
         }
 
-        await rabbitmq_service.publish_message(
+        # Ждем подтверждения брокера; публикация идет пачками через общий буфер процесса
+        await rabbitmq_service.enqueue_message(
             queue_name="package_registration",
             message=message
         )
@@ -104,14 +167,23 @@ async def create_package_async(
 
 
 @router.get("/package-types/", response_model=list[PackageTypeResponse], summary="Получить все типы посылок")
-async def get_package_types():
-    """Возвращает все доступные типы посылок с их ID."""
+async def get_package_types(request: Request):
+    """
+    Возвращает все доступные типы посылок с их ID.
+    Ответ заранее сериализован справочником и отдается с ETag; при совпадении If-None-Match — 304 без тела.
+    """
     try:
-        package_types = await PackageService().get_package_types()
-        return [
-            PackageTypeResponse(id=pt.id, name=pt.name)
-            for pt in package_types
-        ]
+        body, etag = await PackageTypeRegistry().get_serialized()
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match and (
+            if_none_match.strip() == '*'
+            or etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+        ):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type='application/json', headers=headers)
     except Exception as e:
         logger.error(f"Ошибка при получении типов посылок: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
@@ -122,53 +194,165 @@ async def get_packages(
     request: Request,
     page: int = Query(1, ge=1, description="Номер страницы"),
     size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы (вместо page)"),
+    include_total: bool = Query(True, description="Считать общее количество посылок и страниц"),
     filters: PackageFilter = Depends(get_package_filter)
 ):
-    """Возвращает список посылок текущего пользователя с пагинацией и фильтрацией."""
+    """
+    Возвращает список посылок текущего пользователя с пагинацией и фильтрацией.
+    Для глубокого пролистывания используйте cursor из next_cursor вместе с include_total=false:
+    время ответа при этом не зависит от глубины страницы.
+    """
     try:
         session_id = request.state.session_id
         packages, total = await PackageService().get_user_packages(
-            session_id, page, size, filters
+            session_id, page, size, filters,
+            cursor=decode_cursor(cursor) if cursor else None,
+            include_total=include_total
         )
 
         # Рассчитываем общее количество страниц
-        pages = (total + size - 1) // size if total > 0 else 0
-
-        package_responses = []
-        for package in packages:
-            package_type_response = None
-            if package.package_type:
-                package_type_response = PackageTypeResponse(
-                    id=package.package_type.id,
-                    name=package.package_type.name
-                )
-
-            package_responses.append(PackageResponse(
-                id=package.id,
-                name=package.name,
-                weight=package.weight,
-                package_type_id=package.package_type_id,
-                content_cost_usd=package.content_cost_usd,
-                delivery_cost_rub=package.delivery_cost_rub,
-                transport_company_id=package.transport_company_id,
-                created_at=package.created_at,
-                updated_at=package.updated_at,
-                package_type=package_type_response
-            ))
-
-        return PackageListResponse(
-            items=package_responses,
-            total=total,
-            page=page,
-            size=size,
-            pages=pages
-        )
+        pages = None
+        if total is not None:
+            pages = (total + size - 1) // size if total > 0 else 0
+
+        next_cursor = None
+        if len(packages) == size:
+            next_cursor = encode_cursor(packages[-1].created_at, packages[-1].id)
+
+        package_type_names = await PackageTypeRegistry().get_names()
+
+        # Ответ сериализуется сразу в байты, без моделей PackageResponse и повторной валидации
+        return FastJSONResponse({
+            'items': [serialize_package(package, package_type_names) for package in packages],
+            'total': total,
+            'page': page,
+            'size': size,
+            'pages': pages,
+            'next_cursor': next_cursor,
+        })
 
+    except ValueError as e:
+        logger.warning(f"Ошибка валидации при получении списка посылок: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Ошибка при получении списка посылок: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+EXPORT_CSV_COLUMNS = (*PackageService.RESPONSE_COLUMNS, 'package_type_name')
+
+
+async def encode_export(
+    rows: AsyncIterator[Any],
+    export_format: str,
+    package_type_names: Dict[int, str]
+) -> AsyncIterator[bytes]:
+    """Кодирует строки посылок в NDJSON или CSV фрагментами по PACKAGES_EXPORT_BATCH_SIZE строк"""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    lines = []
+
+    if export_format == 'csv':
+        writer.writerow(EXPORT_CSV_COLUMNS)
+
+    count = 0
+    async for row in rows:
+        if export_format == 'ndjson':
+            lines.append(to_json(serialize_package(row, package_type_names)))
+            lines.append(b'\n')
+        else:
+            writer.writerow((
+                row.id,
+                row.name,
+                row.weight,
+                row.package_type_id,
+                row.content_cost_usd,
+                row.delivery_cost_rub,
+                row.transport_company_id,
+                row.created_at.isoformat() if row.created_at else None,
+                row.updated_at.isoformat() if row.updated_at else None,
+                package_type_names.get(row.package_type_id),
+            ))
+
+        count += 1
+        if count % PACKAGES_EXPORT_BATCH_SIZE == 0:
+            yield _take_chunk(lines, buffer)
+
+    chunk = _take_chunk(lines, buffer)
+    if chunk:
+        yield chunk
+
+
+def _take_chunk(lines: list, buffer: io.StringIO) -> bytes:
+    """Забирает накопленные строки NDJSON или содержимое буфера CSV"""
+
+    if lines:
+        chunk = b''.join(lines)
+        lines.clear()
+        return chunk
+
+    chunk = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Сжимает поток фрагментов в один gzip-поток"""
+
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/packages/export", summary="Выгрузить все свои посылки")
+async def export_packages(
+    request: Request,
+    export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format', description="Формат выгрузки"),
+    gzip: bool = Query(False, description="Сжать ответ gzip (Content-Encoding: gzip)"),
+    filters: PackageFilter = Depends(get_package_filter)
+):
+    """
+    Выгружает все посылки текущего пользователя (новые первыми) в NDJSON или CSV без пагинации.
+    Строки читаются серверным курсором и отправляются клиенту по мере чтения,
+    поэтому память сервера не зависит от количества посылок.
+    """
+    session_id = request.state.session_id
+    package_type_names = await PackageTypeRegistry().get_names()
+
+    async def stream():
+        async with aclosing(PackageService().stream_user_packages(session_id, filters)) as rows:
+            chunks = encode_export(rows, export_format, package_type_names)
+            if gzip:
+                chunks = gzip_chunks(chunks)
+
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                # Заголовки уже отправлены: клиент получит оборванный ответ
+                logger.error(f"Ошибка при выгрузке посылок сессии {session_id}: {e}")
+                raise
+
+    headers = {'Content-Disposition': f'attachment; filename="packages.{export_format}"'}
+    if gzip:
+        headers['Content-Encoding'] = 'gzip'
+
+    logger.info(f"Выгрузка посылок сессии {session_id} в формате {export_format}")
+
+    return StreamingResponse(stream(), media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+
 @router.get("/packages/{package_id}", response_model=PackageDetailResponse, summary="Получить данные о посылке")
 async def get_package(package_id: int, request: Request):
     """Возвращает подробные данные о посылке по её ID."""
@@ -180,25 +364,7 @@ async def get_package(package_id: int, request: Request):
         if not package:
             raise HTTPException(status_code=404, detail="Посылка не найдена")
 
-        package_type_response = None
-        if package.package_type:
-            package_type_response = PackageTypeResponse(
-                id=package.package_type.id,
-                name=package.package_type.name
-            )
-
-        return PackageDetailResponse(
-            id=package.id,
-            name=package.name,
-            weight=package.weight,
-            package_type_id=package.package_type_id,
-            content_cost_usd=package.content_cost_usd,
-            delivery_cost_rub=package.delivery_cost_rub,
-            transport_company_id=package.transport_company_id,
-            created_at=package.created_at,
-            updated_at=package.updated_at,
-            package_type=package_type_response
-        )
+        return FastJSONResponse(serialize_package(package, await PackageTypeRegistry().get_names()))
 
     except HTTPException:
         raise
@@ -217,21 +383,18 @@ async def assign_transport_company(
 
     try:
         session_id = request.state.session_id
-        success = await PackageService().assign_transport_company(
+        assigned_company_id = await PackageService().assign_transport_company(
             package_id, session_id, company_data.company_id
         )
 
-        if not success:
-            package = await PackageService().get_package_by_id(package_id, session_id)
-            if not package:
-                raise HTTPException(status_code=404, detail="Посылка не найдена")
-            if package.transport_company_id:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"Посылка уже привязана к транспортной компании {package.transport_company_id}"
-                )
-
-            raise HTTPException(status_code=400, detail="Не удалось привязать транспортную компанию")
+        if assigned_company_id is None:
+            raise HTTPException(status_code=404, detail="Посылка не найдена")
+
+        if assigned_company_id != company_data.company_id:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Посылка уже привязана к транспортной компании {assigned_company_id}"
+            )
 
         return JSONResponse(
             content={"message": f"Посылка успешно привязана к транспортной компании {company_data.company_id}"},
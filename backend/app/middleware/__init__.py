@@ -4,11 +4,13 @@ from starlette.middleware.errors import ServerErrorMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from app.settings import DEBUG_MODE
 from .database import DatabaseMiddleware
+from .metrics import MetricsMiddleware
 from .session import SessionMiddleware
 
 
 middleware = [
     Middleware(ServerErrorMiddleware, debug=DEBUG_MODE),
+    Middleware(MetricsMiddleware),
     Middleware(ProxyHeadersMiddleware, trusted_hosts='*'),
     Middleware(SessionMiddleware),
     Middleware(DatabaseMiddleware),
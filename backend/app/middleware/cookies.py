@@ -0,0 +1,13 @@
+from http.cookies import SimpleCookie
+
+
+def build_set_cookie_header(key: str, value: str, max_age: int) -> str:
+    """Формирует значение заголовка Set-Cookie (HttpOnly, SameSite=lax, Path=/)"""
+
+    cookie = SimpleCookie()
+    cookie[key] = value
+    cookie[key]['max-age'] = max_age
+    cookie[key]['path'] = '/'
+    cookie[key]['httponly'] = True
+    cookie[key]['samesite'] = 'lax'
+    return cookie.output(header='').strip()
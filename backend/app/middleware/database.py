@@ -1,28 +1,65 @@
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.database import get_db_session_manager
+from app.settings import DATABASE_REPLICA_URLS, DATABASE_REPLICA_STICKY_SECONDS
+from .cookies import build_set_cookie_header
 
 logger = logging.getLogger(__name__)
 
-class DatabaseMiddleware(BaseHTTPMiddleware):
-    """Middleware для управления сессиями базы данных"""
+READ_ONLY_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+PRIMARY_STICKY_COOKIE_NAME = 'db_primary'
+
+
+class DatabaseMiddleware:
+    """
+    Middleware для управления сессиями базы данных.
+    Транзакция фиксируется (2xx) или откатывается перед отправкой заголовков ответа,
+    поэтому ошибка коммита превращается в 500, а клиент не получает успешный ответ
+    до сохранения данных. Если сессия БД в запросе не открывалась, ничего не делает.
+
+    Если настроены реплики, чтения запросов GET/HEAD/OPTIONS направляются на реплику.
+    После успешной записи клиент получает cookie db_primary, и в течение
+    DATABASE_REPLICA_STICKY_SECONDS его чтения идут в основную БД (read-your-writes).
+    """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         db_session_manager = get_db_session_manager()
 
-        try:
-            response = await call_next(request)
+        is_read_only = scope['method'] in READ_ONLY_METHODS
+        use_replica = (
+            bool(DATABASE_REPLICA_URLS)
+            and is_read_only
+            and PRIMARY_STICKY_COOKIE_NAME not in HTTPConnection(scope).cookies
+        )
+        replica_token = db_session_manager.use_replica(use_replica)
 
-            if 200 <= response.status_code < 300:
-                await db_session_manager.commit()
-            else:
-                await db_session_manager.rollback()
+        async def send_wrapper(message: Message):
+            if message['type'] == 'http.response.start' and db_session_manager.has_session():
+                if 200 <= message['status'] < 300:
+                    await db_session_manager.commit()
+
+                    if DATABASE_REPLICA_URLS and not is_read_only:
+                        MutableHeaders(scope=message).append('set-cookie', build_set_cookie_header(
+                            PRIMARY_STICKY_COOKIE_NAME, '1', DATABASE_REPLICA_STICKY_SECONDS
+                        ))
+                else:
+                    await db_session_manager.rollback()
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
 
         except Exception as e:
             logger.error(f'Исключение в обработке запроса: {e}')
@@ -31,5 +68,4 @@ class DatabaseMiddleware(BaseHTTPMiddleware):
         finally:
             # Всегда закрываем сессию
             await db_session_manager.close()
-
-        return response
\ No newline at end of file
+            db_session_manager.reset_replica(replica_token)
@@ -0,0 +1,57 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    HTTP_REQUEST_SECONDS,
+    HTTP_RESPONSES_TOTAL,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    start_request_metrics,
+    finish_request_metrics,
+)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Middleware для сбора метрик HTTP-запросов.
+    Метки строятся по шаблону маршрута (/packages/{package_id}), а не по фактическому пути,
+    чтобы число серий не росло вместе с количеством посылок. Запросы, не попавшие ни в один
+    маршрут, учитываются под меткой unmatched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics, token = start_request_metrics()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            finish_request_metrics(token)
+
+            # Роутер дополняет scope найденным маршрутом
+            route = scope.get('route')
+            route_path = getattr(route, 'path', UNMATCHED_ROUTE)
+            method = scope['method']
+
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, route_path)
+            HTTP_RESPONSES_TOTAL.inc(method, route_path, str(status_code))
+            HTTP_REQUEST_DB_QUERIES.observe(request_metrics.db_queries, route_path)
+            HTTP_REQUEST_DB_SECONDS.observe(request_metrics.db_seconds, route_path)
@@ -1,36 +1,47 @@
 import uuid
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
 
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SessionMiddleware(BaseHTTPMiddleware):
+from .cookies import build_set_cookie_header
+
+SESSION_COOKIE_NAME = 'session_id'
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 60 * 60  # 30 дней
+
+
+class SessionMiddleware:
     """Middleware для работы с сессиями пользователей"""
-    
+
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
-    
-    async def dispatch(self, request: Request, call_next):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
         # Получаем session_id из cookies или создаем новый
-        session_id = request.cookies.get("session_id")
-        
-        if not session_id:
+        session_id = HTTPConnection(scope).cookies.get(SESSION_COOKIE_NAME)
+        is_new_session = not session_id
+
+        if is_new_session:
             session_id = str(uuid.uuid4())
-        
+
         # Добавляем session_id в state запроса
-        request.state.session_id = session_id
-        
-        # Выполняем запрос
-        response = await call_next(request)
-        
-        # Устанавливаем cookie с session_id если его не было
-        if not request.cookies.get("session_id"):
-            response.set_cookie(
-                key="session_id",
-                value=session_id,
-                max_age=30 * 24 * 60 * 60,  # 30 дней
-                httponly=True,
-                samesite="lax"
-            )
-        
-        return response
+        scope.setdefault('state', {})['session_id'] = session_id
+
+        if not is_new_session:
+            await self.app(scope, receive, send)
+            return
+
+        # Устанавливаем cookie с session_id, так как его не было
+        set_cookie_header = build_set_cookie_header(SESSION_COOKIE_NAME, session_id, SESSION_COOKIE_MAX_AGE)
+
+        async def send_wrapper(message: Message):
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('set-cookie', set_cookie_header)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
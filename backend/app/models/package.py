@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import ORMBaseModel
+from app.utils import utc_now
 from .mixins import IntIdMixin
 
 
@@ -9,6 +10,11 @@ class Package(ORMBaseModel, IntIdMixin):
     """Модель посылки"""
 
     __tablename__ = 'packages'
+    __table_args__ = (
+        Index('ix_packages_session_id_created_at_id', 'session_id', 'created_at', 'id'),
+        Index('ix_packages_session_id_package_type_id', 'session_id', 'package_type_id'),
+        Index('ix_packages_delivery_cost_rub_id', 'delivery_cost_rub', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
@@ -18,8 +24,10 @@ class Package(ORMBaseModel, IntIdMixin):
     delivery_cost_rub = Column(Float, nullable=True)  # стоимость доставки в рублях
     session_id = Column(String(255), nullable=False)  # ID сессии пользователя
     transport_company_id = Column(Integer, nullable=True)  # ID транспортной компании
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    insert_batch = Column(String(32), nullable=True)  # токен многострочной вставки (PackageService.create_packages)
+    # Время берется у приложения (utc_now), в том числе для UPDATE, где updated_at не задан явно
+    created_at = Column(DateTime(timezone=True), default=utc_now, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=utc_now)
     
     # relationship
     package_type = relationship("PackageType", back_populates="packages")
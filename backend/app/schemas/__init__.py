@@ -4,6 +4,7 @@ from .package import (
     PackageResponse,
     PackageDetailResponse,
     PackageListResponse,
+    PackageBulkCreateResponse,
     PackageFilter,
     TransportCompanyAssign
 )
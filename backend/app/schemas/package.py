@@ -39,10 +39,17 @@ class PackageListResponse(BaseModel):
     """Схема ответа списка посылок с пагинацией"""
 
     items: list[PackageResponse] = Field(description="Список посылок")
-    total: int = Field(description="Общее количество посылок")
+    total: Optional[int] = Field(None, description="Общее количество посылок (не считается при include_total=false)")
     page: int = Field(description="Номер страницы")
     size: int = Field(description="Размер страницы")
-    pages: int = Field(description="Общее количество страниц")
+    pages: Optional[int] = Field(None, description="Общее количество страниц (не считается при include_total=false)")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы, если она может существовать")
+
+
+class PackageBulkCreateResponse(BaseModel):
+    """Схема ответа пакетной регистрации посылок"""
+
+    ids: list[int] = Field(description="ID созданных посылок в порядке переданных данных")
 
 
 class PackageFilter(BaseModel):
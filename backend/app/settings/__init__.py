@@ -4,14 +4,59 @@ from pathlib import Path
 from app.utils import safe_strtobool
 
 DATABASE_URL = os.getenv('DATABASE_URL')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_TIMEOUT_SECONDS', 10))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE_SECONDS', 1800))  # раньше таймаута простоя прокси
+DB_POOL_PRE_PING = safe_strtobool(os.getenv('DB_POOL_PRE_PING', 'true'))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))  # 0 — без ограничения
+
+# Реплики для чтения (через запятую); пусто — все запросы идут в основную БД
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+# Сколько секунд после записи чтения клиента идут в основную БД (read-your-writes)
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 5))
 
 URL_PREFIX = os.getenv('URL_PREFIX', '/backend/api').rstrip('/')
 
 # Cache
 REDIS_URL = os.getenv('REDIS_URL')
+CACHE_LOCAL_MAX_SIZE = int(os.getenv('CACHE_LOCAL_MAX_SIZE', 1024))  # 0 отключает in-process уровень
+CACHE_LOCAL_TTL_SECONDS = float(os.getenv('CACHE_LOCAL_TTL_SECONDS', 60))
 
 # RabbitMQ
 RABBITMQ_URL = os.getenv('RABBITMQ_URL')
+RABBITMQ_CONSUMER_PREFETCH = int(os.getenv('RABBITMQ_CONSUMER_PREFETCH', 200))
+RABBITMQ_CONSUMER_BATCH_SIZE = int(os.getenv('RABBITMQ_CONSUMER_BATCH_SIZE', 100))
+RABBITMQ_CONSUMER_BATCH_MAX_WAIT_SECONDS = float(os.getenv('RABBITMQ_CONSUMER_BATCH_MAX_WAIT_SECONDS', 0.5))
+RABBITMQ_PUBLISH_CHANNELS = int(os.getenv('RABBITMQ_PUBLISH_CHANNELS', 4))
+RABBITMQ_PUBLISH_BATCH_SIZE = int(os.getenv('RABBITMQ_PUBLISH_BATCH_SIZE', 200))
+RABBITMQ_PUBLISH_MAX_LATENCY_SECONDS = float(os.getenv('RABBITMQ_PUBLISH_MAX_LATENCY_SECONDS', 0.005))
+RABBITMQ_PUBLISH_BUFFER_SIZE = int(os.getenv('RABBITMQ_PUBLISH_BUFFER_SIZE', 10000))
+RABBITMQ_PUBLISH_TIMEOUT_SECONDS = float(os.getenv('RABBITMQ_PUBLISH_TIMEOUT_SECONDS', 10))
+
+# Celery
+CELERY_CLIENT_MAX_WORKERS = int(os.getenv('CELERY_CLIENT_MAX_WORKERS', 4))  # потоки для отправки задач
+CELERY_TASK_STATUS_BATCH_MAX_SIZE = int(os.getenv('CELERY_TASK_STATUS_BATCH_MAX_SIZE', 100))
+
+# Events (SSE)
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+EVENTS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv('EVENTS_SUBSCRIBER_QUEUE_SIZE', 100))
+
+# Packages
+PACKAGES_BULK_MAX_SIZE = int(os.getenv('PACKAGES_BULK_MAX_SIZE', 1000))
+# Как часто процесс проверяет версию справочника типов посылок
+PACKAGE_TYPES_VERSION_CHECK_SECONDS = float(os.getenv('PACKAGE_TYPES_VERSION_CHECK_SECONDS', 30))
+# Выгрузка посылок: строк на одну выборку серверного курсора и на один отправляемый клиенту фрагмент
+PACKAGES_EXPORT_BATCH_SIZE = int(os.getenv('PACKAGES_EXPORT_BATCH_SIZE', 1000))
+
+# Delivery cost
+DELIVERY_COST_BATCH_SIZE = int(os.getenv('DELIVERY_COST_BATCH_SIZE', 1000))
+# Считать стоимость при создании посылки, если свежий курс уже есть в кэше (без запроса к API ЦБ)
+DELIVERY_COST_INLINE_PRICING = safe_strtobool(os.getenv('DELIVERY_COST_INLINE_PRICING', 'true'))
+# Пересчет оцененных, но не переданных в доставку посылок при смене курса: ID на одну задачу-раздел
+DELIVERY_COST_REPRICE_PARTITION_SIZE = int(os.getenv('DELIVERY_COST_REPRICE_PARTITION_SIZE', 100000))
+DELIVERY_COST_REPRICE_CHECKPOINT_TTL_SECONDS = int(os.getenv('DELIVERY_COST_REPRICE_CHECKPOINT_TTL_SECONDS', 86400))
+CBR_API_URL = os.getenv('CBR_API_URL', 'https://www.cbr-xml-daily.ru/daily_json.js')
 
 DEBUG_MODE = safe_strtobool(os.getenv('DEBUG_MODE', 'false'))
 
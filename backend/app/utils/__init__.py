@@ -1,2 +1,5 @@
 from .singleton import Singleton
-from .safe_strtobool import safe_strtobool
\ No newline at end of file
+from .safe_strtobool import safe_strtobool
+from .cursor import encode_cursor, decode_cursor
+from .json_response import FastJSONResponse
+from .utc_now import utc_now
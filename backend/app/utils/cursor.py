@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, package_id: int) -> str:
+    """Кодирует позицию в списке посылок (created_at, id) в непрозрачную строку"""
+
+    raw = json.dumps([created_at.isoformat(), package_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Декодирует курсор, выданный encode_cursor. Raises ValueError при невалидном курсоре."""
+
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        created_at, package_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(created_at), int(package_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Невалидный курсор: {cursor}") from e
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ, сериализуемый pydantic_core.to_json сразу в байты.
+    Возвращенный из обработчика ответ не проходит повторную валидацию по response_model
+    и jsonable_encoder, поэтому содержимое должно уже иметь форму схемы ответа
+    (словари и списки; datetime сериализуется в ISO 8601, как в pydantic).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
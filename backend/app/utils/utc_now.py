@@ -0,0 +1,11 @@
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """
+    Время для created_at/updated_at посылок. Все записи берут время у приложения (UTC),
+    а не NOW() часового пояса сессии MySQL, чтобы порядок created_at DESC и курсоры списка
+    не зависели от того, каким путем создана или изменена посылка.
+    Столбец DATETIME хранит секунды, поэтому микросекунды отбрасываются, чтобы ответ совпадал с БД.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
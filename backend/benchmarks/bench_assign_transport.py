@@ -0,0 +1,70 @@
+"""
+Бенчмарк конкурентной привязки транспортной компании: для каждой посылки
+N конкурентов одновременно пытаются закрепить ее за собой. Отчет содержит
+пропускную способность попыток и успешных привязок, перцентили задержки
+и проверку, что у каждой посылки ровно один победитель.
+
+Запуск (нужны MySQL и Redis из docker-compose):
+    python -m benchmarks.bench_assign_transport --packages 200 --claimers 16
+"""
+import argparse
+import asyncio
+import time
+
+from httpx import ASGITransport, AsyncClient
+
+from app.asgi import app
+from benchmarks.common import print_report, summarize
+
+BASE_URL = 'http://bench'
+API_PREFIX = '/backend/api'
+
+
+async def main(packages: int, claimers: int):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url=BASE_URL) as client:
+        response = await client.post(f'{API_PREFIX}/packages/bulk', json=[{
+            'name': 'Бенчмарк привязки',
+            'weight': 1.0,
+            'package_type_id': 1,
+            'content_cost_usd': 10.0,
+        }] * packages)
+        response.raise_for_status()
+        package_ids = response.json()['ids']
+
+        latencies = []
+        winners = {}
+        errors = 0
+
+        async def claim(package_id: int, company_id: int):
+            nonlocal errors
+            start = time.perf_counter()
+            claim_response = await client.post(
+                f'{API_PREFIX}/packages/{package_id}/assign-transport',
+                json={'company_id': company_id}
+            )
+            latencies.append(time.perf_counter() - start)
+
+            if claim_response.status_code == 200:
+                winners.setdefault(package_id, []).append(company_id)
+            elif claim_response.status_code != 409:
+                errors += 1
+
+        started = time.perf_counter()
+        for package_id in package_ids:
+            await asyncio.gather(*(claim(package_id, company_id) for company_id in range(1, claimers + 1)))
+        elapsed = time.perf_counter() - started
+
+    report = summarize(latencies, elapsed, errors)
+    report['claims_per_s'] = round(len(winners) / elapsed, 1) if elapsed > 0 else 0.0
+    report['packages'] = packages
+    report['claimers_per_package'] = claimers
+    report['single_winner'] = len(winners) == packages and all(len(w) == 1 for w in winners.values())
+    print_report(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--packages', type=int, default=200, help='Количество разыгрываемых посылок')
+    parser.add_argument('--claimers', type=int, default=16, help='Количество конкурентов на посылку')
+    args = parser.parse_args()
+    asyncio.run(main(args.packages, args.claimers))
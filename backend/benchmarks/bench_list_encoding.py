@@ -0,0 +1,116 @@
+"""
+Микробенчмарк сериализации страницы списка посылок, без БД и HTTP.
+Сравнивает прежний путь (модели PackageResponse/PackageTypeResponse, собранные по полям,
+повторная валидация по response_model, сериализация в python-объекты и json.dumps в JSONResponse,
+как делает FastAPI) с FastJSONResponse из словарей serialize_package.
+
+Запуск (из каталога backend):
+    python -m benchmarks.bench_list_encoding --size 100 --iterations 2000
+"""
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.business import PackageService
+from app.endpoints.packages_endpoint import serialize_package
+from app.schemas import PackageListResponse, PackageResponse, PackageTypeResponse
+from app.utils import FastJSONResponse
+from benchmarks.common import print_report
+
+PACKAGE_TYPE_NAMES = {1: 'Одежда', 2: 'Электроника', 3: 'Разное'}
+
+# Строки в форме результата PackageService.package_rows_query
+PackageRow = namedtuple('PackageRow', PackageService.RESPONSE_COLUMNS)
+
+
+def build_packages(size: int) -> list:
+    created_at = datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        PackageRow(
+            id=i,
+            name=f'Посылка {i}',
+            weight=1.5 + i % 10,
+            package_type_id=i % 3 + 1,
+            content_cost_usd=100.0 + i,
+            delivery_cost_rub=(1234.56 + i) if i % 4 else None,
+            transport_company_id=(i % 7) or None,
+            created_at=created_at - timedelta(seconds=i),
+            updated_at=None,
+        )
+        for i in range(size)
+    ]
+
+
+def encode_models(packages: list, response_adapter: TypeAdapter) -> bytes:
+    """Прежний путь: модели по полям, затем валидация и сериализация ответа, как в FastAPI"""
+
+    items = []
+    for package in packages:
+        name = PACKAGE_TYPE_NAMES.get(package.package_type_id)
+        items.append(PackageResponse(
+            id=package.id,
+            name=package.name,
+            weight=package.weight,
+            package_type_id=package.package_type_id,
+            content_cost_usd=package.content_cost_usd,
+            delivery_cost_rub=package.delivery_cost_rub,
+            transport_company_id=package.transport_company_id,
+            created_at=package.created_at,
+            updated_at=package.updated_at,
+            package_type=PackageTypeResponse(id=package.package_type_id, name=name) if name else None
+        ))
+
+    response = PackageListResponse(items=items, total=len(items), page=1, size=len(items), pages=1)
+    content = response_adapter.dump_python(response_adapter.validate_python(response), mode='json')
+    return JSONResponse(content).body
+
+
+def encode_dicts(packages: list) -> bytes:
+    """Новый путь: словари и pydantic_core.to_json"""
+
+    return FastJSONResponse({
+        'items': [serialize_package(package, PACKAGE_TYPE_NAMES) for package in packages],
+        'total': len(packages),
+        'page': 1,
+        'size': len(packages),
+        'pages': 1,
+        'next_cursor': None,
+    }).body
+
+
+def measure(encode, iterations: int) -> dict:
+    encode()
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        encode()
+    elapsed = time.perf_counter() - started_at
+    return {
+        'iterations': iterations,
+        'us_per_page': round(elapsed / iterations * 1_000_000, 1),
+        'pages_per_s': round(iterations / elapsed, 1),
+    }
+
+
+def main(size: int, iterations: int):
+    packages = build_packages(size)
+    response_adapter = TypeAdapter(PackageListResponse)
+
+    report = {
+        'page_size': size,
+        'models': measure(lambda: encode_models(packages, response_adapter), iterations),
+        'fast_json': measure(lambda: encode_dicts(packages), iterations),
+    }
+    report['speedup'] = round(report['models']['us_per_page'] / report['fast_json']['us_per_page'], 2)
+    print_report(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100, help='Посылок на странице')
+    parser.add_argument('--iterations', type=int, default=2000, help='Сериализаций страницы')
+    args = parser.parse_args()
+    main(args.size, args.iterations)
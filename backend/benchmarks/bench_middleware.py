@@ -0,0 +1,73 @@
+"""
+Бенчмарк middleware: RPS эндпоинтов списка и деталей посылки для стека
+из чистых ASGI middleware и для того же стека, обернутого двумя слоями
+BaseHTTPMiddleware, что воспроизводит накладные расходы прежней реализации
+SessionMiddleware/DatabaseMiddleware (отдельная задача и memory streams на запрос).
+
+Запуск (нужны MySQL и Redis из docker-compose):
+    python -m benchmarks.bench_middleware --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.asgi import app
+from benchmarks.common import print_report, run_fixed_concurrency
+
+BASE_URL = 'http://bench'
+API_PREFIX = '/backend/api'
+
+
+async def _pass_through(request, call_next):
+    return await call_next(request)
+
+
+def build_legacy_app():
+    """Приложение с двумя дополнительными BaseHTTPMiddleware-слоями"""
+    return BaseHTTPMiddleware(BaseHTTPMiddleware(app, dispatch=_pass_through), dispatch=_pass_through)
+
+
+async def bench_app(asgi_app, total_requests: int, concurrency: int) -> dict:
+    async with AsyncClient(transport=ASGITransport(app=asgi_app), base_url=BASE_URL) as client:
+        response = await client.post(f'{API_PREFIX}/packages/', json={
+            'name': 'Бенчмарк middleware',
+            'weight': 1.0,
+            'package_type_id': 1,
+            'content_cost_usd': 10.0,
+        })
+        response.raise_for_status()
+        package_id = response.json()['id']
+
+        async def get_list(_):
+            return (await client.get(f'{API_PREFIX}/packages/?size=20')).status_code == 200
+
+        async def get_detail(_):
+            return (await client.get(f'{API_PREFIX}/packages/{package_id}')).status_code == 200
+
+        return {
+            'list': await run_fixed_concurrency(get_list, total_requests, concurrency),
+            'detail': await run_fixed_concurrency(get_detail, total_requests, concurrency),
+        }
+
+
+async def main(total_requests: int, concurrency: int):
+    report = {
+        'asgi': await bench_app(app, total_requests, concurrency),
+        'base_http_middleware': await bench_app(build_legacy_app(), total_requests, concurrency),
+    }
+    for endpoint in ('list', 'detail'):
+        asgi_rps = report['asgi'][endpoint]['throughput_rps']
+        legacy_rps = report['base_http_middleware'][endpoint]['throughput_rps']
+        report.setdefault('speedup', {})[endpoint] = round(asgi_rps / legacy_rps, 3) if legacy_rps else None
+
+    print_report(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Количество запросов на эндпоинт')
+    parser.add_argument('--concurrency', type=int, default=20, help='Количество одновременных клиентов')
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,69 @@
+"""
+Общие утилиты бенчмарков: нагрузка с фиксированной конкурентностью и сводная статистика
+"""
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированной выборке методом ближайшего ранга"""
+
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> dict:
+    """Сводка по задержкам (секунды) в миллисекундах и пропускной способности"""
+
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+async def run_fixed_concurrency(
+    operation: Callable[[int], Awaitable[object]],
+    total_requests: int,
+    concurrency: int
+) -> dict:
+    """
+    Выполняет operation(i) total_requests раз с concurrency одновременными исполнителями.
+    Операция считается ошибкой, если бросила исключение или вернула False.
+    """
+
+    latencies = []
+    errors = 0
+    indexes = iter(range(total_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                ok = await operation(i)
+            except Exception:
+                ok = False
+            if ok is False:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def print_report(report: dict):
+    """Печатает отчет в машиночитаемом JSON"""
+    print(json.dumps(report, indent=2, ensure_ascii=False))
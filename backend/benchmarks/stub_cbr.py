@@ -0,0 +1,69 @@
+"""
+Заглушка API ЦБ РФ для бенчмарков: отдает daily_json.js с фиксированным курсом USD
+и необязательной искусственной задержкой, чтобы результаты не зависели от внешней сети.
+
+Отдельный запуск:
+    python -m benchmarks.stub_cbr --port 8088 --rate 90.5
+и затем CBR_API_URL=http://127.0.0.1:8088/daily_json.js
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubCBRServer:
+    """HTTP-сервер заглушки в фоновом потоке"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, rate: float = 90.5, delay_seconds: float = 0.0):
+        body = json.dumps({
+            'Date': time.strftime('%Y-%m-%dT11:30:00+03:00'),
+            'Valute': {'USD': {'CharCode': 'USD', 'Nominal': 1, 'Value': rate}},
+        }).encode('utf-8')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if delay_seconds:
+                    time.sleep(delay_seconds)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/javascript; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-cbr', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/daily_json.js'
+
+    def start(self) -> 'StubCBRServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--rate', type=float, default=90.5, help='Курс USD, который отдает заглушка')
+    parser.add_argument('--delay', type=float, default=0.0, help='Задержка ответа, секунды')
+    args = parser.parse_args()
+
+    server = StubCBRServer(args.host, args.port, args.rate, args.delay).start()
+    print(f'Заглушка API ЦБ: {server.url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
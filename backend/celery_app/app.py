@@ -1,9 +1,14 @@
+import time
 from celery import Celery
 from kombu import Queue
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown, task_prerun, task_postrun
 
 from app.settings import REDIS_URL
 from app.configure import configure
+from app.core.events import EventBus
+from app.core.metrics import CELERY_TASK_SECONDS
+from celery_app.runtime import WorkerRuntime
 
 configure()
 
@@ -41,6 +46,8 @@ app.conf.update(
     task_routes={
         'celery_app.tasks.*': {'queue': 'main.tasks', 'routing_key': 'main.tasks'},
         'calculate_delivery_costs': {'queue': 'main.tasks', 'routing_key': 'main.tasks'},
+        'reprice_delivery_costs': {'queue': 'main.tasks', 'routing_key': 'main.tasks'},
+        'reprice_delivery_costs_partition': {'queue': 'main.tasks', 'routing_key': 'main.tasks'},
     },
 
     beat_scheduler='redbeat.RedBeatScheduler',
@@ -63,3 +70,55 @@ app.conf.update(
     timezone='UTC',
     enable_utc=True,
 )
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    """Запускает общий event loop при старте дочернего процесса воркера"""
+    WorkerRuntime().start()
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**kwargs):
+    """Закрывает подключения и останавливает event loop при завершении процесса воркера"""
+    WorkerRuntime().stop()
+
+
+# Время старта выполняемых задач процесса по task_id
+_task_started_at = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    """Запоминает время старта задачи"""
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    """Отправляет длительность задачи в общую гистограмму, не задерживая воркер"""
+
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is None:
+        return
+
+    WorkerRuntime().submit(
+        CELERY_TASK_SECONDS.observe_async(time.perf_counter() - started_at, task.name, state or 'UNKNOWN')
+    )
+
+
+@task_postrun.connect
+def publish_task_finished(task_id=None, task=None, state=None, retval=None, kwargs=None, **extra):
+    """Сообщает в поток событий сессии о завершении задачи, запущенной с session_id"""
+
+    session_id = (kwargs or {}).get('session_id')
+    if not session_id or state == 'RETRY':
+        return
+
+    result = retval if state == 'SUCCESS' else str(retval)
+    WorkerRuntime().submit(EventBus().publish(session_id, 'task_finished', {
+        'task_id': task_id,
+        'task': task.name,
+        'status': state,
+        'result': result,
+    }))
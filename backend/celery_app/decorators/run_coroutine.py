@@ -1,18 +1,21 @@
-from asyncio import run, iscoroutinefunction
+from asyncio import iscoroutinefunction
 from functools import wraps
 
+from celery_app.runtime import WorkerRuntime
+
 
 def run_coroutine(func):
     """
     Декоратор для преобразования асинхронных функций в синхронные.
-    Автоматически запускает корутины с помощью asyncio.run()
+    Корутина выполняется в долгоживущем event loop процесса воркера (WorkerRuntime),
+    а не в новом loop через asyncio.run(), поэтому соединения переиспользуются между задачами.
     Если переданная функция не является корутиной, возвращается без изменений.
     """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
         """Обертка для запуска асинхронной функции синхронно."""
-        return run(func(*args, **kwargs))
+        return WorkerRuntime().run(func(*args, **kwargs))
 
     if iscoroutinefunction(func):
         return wrapper
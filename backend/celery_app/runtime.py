@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+from app.business.currency_service import CurrencyService
+from app.core.cache import Cache
+from app.core.database.engine import dispose_engines
+from app.core.events import EventBus
+from app.core.rabbitmq_service import RabbitMQService
+from app.utils import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerRuntime(metaclass=Singleton):
+    """
+    Долгоживущий event loop процесса Celery воркера.
+    Loop работает в отдельном потоке на протяжении всей жизни процесса, задачи отправляют
+    в него свои корутины, поэтому пул соединений движка БД, клиент Redis и подключение
+    к RabbitMQ создаются один раз и переиспользуются всеми задачами процесса.
+    """
+
+    SHUTDOWN_TIMEOUT_SECONDS = 10
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """Запущен ли loop в текущем процессе (после fork поток родителя не наследуется)"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Запускает event loop в фоновом потоке, если он еще не запущен"""
+
+        with self._lock:
+            if self.is_running:
+                return
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=self._run_loop,
+                args=(loop,),
+                name='celery-worker-runtime',
+                daemon=True
+            )
+            thread.start()
+
+            self._loop = loop
+            self._thread = thread
+            logger.info("Event loop воркера запущен")
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """Выполняет корутину в event loop воркера и синхронно возвращает результат"""
+
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """Планирует корутину в event loop воркера, не дожидаясь результата"""
+
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def stop(self):
+        """Закрывает общие подключения и останавливает event loop"""
+
+        with self._lock:
+            if not self.is_running:
+                return
+
+            loop, thread = self._loop, self._thread
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._close_connections(), loop
+                ).result(timeout=self.SHUTDOWN_TIMEOUT_SECONDS)
+            except Exception as e:
+                logger.error(f"Ошибка при закрытии подключений воркера: {e}")
+
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=self.SHUTDOWN_TIMEOUT_SECONDS)
+            loop.close()
+
+            self._loop = None
+            self._thread = None
+            logger.info("Event loop воркера остановлен")
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    @staticmethod
+    async def _close_connections():
+        await dispose_engines()
+        await CurrencyService().close()
+        await EventBus().close()
+        await Cache().close()
+        await RabbitMQService().close()
@@ -1,5 +1,6 @@
 from .rabbitmq_tasks import process_package_from_rabbitmq_task, start_rabbitmq_consumer_task
 from .delivery_cost_tasks import calculate_delivery_costs_task
+from .repricing_tasks import reprice_delivery_costs_task, reprice_delivery_costs_partition_task
 
 
 
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from celery import shared_task
 from celery_app.decorators import use_database, run_coroutine
 from app.business.package_service import PackageService
@@ -9,10 +10,11 @@ logger = logging.getLogger(__name__)
 @shared_task(bind=True, name='calculate_delivery_costs')
 @run_coroutine
 @use_database
-async def calculate_delivery_costs_task(self):
+async def calculate_delivery_costs_task(self, session_id: Optional[str] = None):
     """
     Периодическая задача для расчета стоимости доставки всех необработанных посылок.
     Запускается каждые 5 минут.
+    session_id передается при ручном запуске: по завершении в сессию публикуется task_finished.
     """
     try:
         logger.info("Запуск задачи расчета стоимости доставки")
@@ -1,9 +1,9 @@
 import logging
-import asyncio
 from celery import shared_task
 from celery_app.decorators import use_database, run_coroutine
-from app.core.rabbitmq_service import RabbitMQService
+from app.business.package_registration_consumer import PackageRegistrationConsumer
 from app.business.package_service import PackageService
+from app.core import get_db_session_manager
 from app.schemas import PackageCreate
 
 logger = logging.getLogger(__name__)
@@ -29,16 +29,18 @@ async def process_package_from_rabbitmq_task(self, package_data: dict, session_i
         # Сразу рассчитываем стоимость доставки
         delivery_cost = await PackageService().calculate_delivery_cost(package)
         if delivery_cost:
+            # Посылка создается без привязки к сессии, поэтому стоимость сохраняется отдельным UPDATE
+            await PackageService().set_delivery_cost(package.id, delivery_cost)
             package.delivery_cost_rub = delivery_cost
 
-            from app.core.database import get_db_session_manager
-            db_session_manager = get_db_session_manager()
-            await db_session_manager.flush()
-
             logger.info(f"Посылка {package.id} создана и стоимость доставки рассчитана: {delivery_cost} руб.")
         else:
             logger.warning(f"Не удалось рассчитать стоимость доставки для посылки {package.id}")
 
+        # Событие публикуется только после коммита, чтобы клиент сразу мог прочитать посылку
+        await get_db_session_manager().commit()
+        await PackageService().publish_packages_event('package_created', [(package.id, session_id)])
+
         return {
             "status": "success",
             "package_id": package.id,
@@ -55,40 +57,13 @@ async def process_package_from_rabbitmq_task(self, package_data: dict, session_i
 @run_coroutine
 async def start_rabbitmq_consumer_task():
     """
-    Задача для запуска потребителя сообщений из RabbitMQ.
-    Слушает очередь package_registration и обрабатывает сообщения.
+    Задача для запуска потребителя сообщений из RabbitMQ внутри Celery воркера.
+    Предпочтительно запускать потребителя отдельным процессом командой consume-packages:
+    он обрабатывает сообщения пачками напрямую, без промежуточных Celery задач.
     """
     try:
         logger.info("Запуск RabbitMQ потребителя для очереди package_registration")
-
-        async def handle_package_message(message_data: dict, message):
-            """Обработчик сообщений из очереди package_registration"""
-            try:
-                if message_data.get('type') == 'package_registration':
-                    package_data = message_data.get('package_data', {})
-                    session_id = message_data.get('session_id')
-
-                    if not session_id:
-                        logger.error("Отсутствует session_id в сообщении")
-                        return
-
-                    # Запускаем задачу обработки посылки асинхронно
-                    process_package_from_rabbitmq_task.delay(package_data, session_id)
-                    logger.info(f"Задача обработки посылки запущена для сессии {session_id}")
-                else:
-                    logger.warning(f"Неизвестный тип сообщения: {message_data.get('type')}")
-
-            except Exception as e:
-                logger.error(f"Ошибка при обработке сообщения из RabbitMQ: {e}")
-                raise
-
-        # Подключаемся к RabbitMQ и слушаем очередь
-        await RabbitMQService().consume_messages('package_registration', handle_package_message)
-
-        # Держим соединение активным
-        logger.info("RabbitMQ потребитель активен и слушает сообщения...")
-        while True:
-            await asyncio.sleep(1)
+        await PackageRegistrationConsumer().run()
 
     except Exception as e:
         logger.error(f"Ошибка в RabbitMQ потребителе: {e}")
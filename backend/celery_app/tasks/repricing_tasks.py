@@ -0,0 +1,68 @@
+import logging
+from celery import group, shared_task
+from celery_app.decorators import use_database, run_coroutine
+from app.business.package_service import PackageService
+from app.settings import DELIVERY_COST_REPRICE_PARTITION_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, name='reprice_delivery_costs')
+@run_coroutine
+@use_database
+async def reprice_delivery_costs_task(self, usd_rate: float):
+    """
+    Пересчет стоимости доставки при смене курса (запускает CurrencyService).
+    Делит диапазон ID посылок на разделы по DELIVERY_COST_REPRICE_PARTITION_SIZE
+    и отправляет их группой задач, которые воркеры выполняют параллельно.
+    Контрольные точки разделов привязаны к ID этой задачи, поэтому ее повтор не начинает пересчет заново.
+    """
+    try:
+        id_range = await PackageService().get_package_id_range()
+        if id_range is None:
+            logger.info("Нет посылок для пересчета стоимости доставки")
+            return {"status": "success", "partitions": 0}
+
+        partitions = PackageService.split_id_range(*id_range, DELIVERY_COST_REPRICE_PARTITION_SIZE)
+
+        group(
+            reprice_delivery_costs_partition_task.s(self.request.id, usd_rate, start_id, end_id)
+            for start_id, end_id in partitions
+        ).apply_async()
+
+        logger.info(f"Пересчет стоимости доставки по курсу {usd_rate}: отправлено разделов {len(partitions)}")
+
+        return {
+            "status": "success",
+            "usd_rate": usd_rate,
+            "partitions": len(partitions),
+            "message": f"Отправлено разделов: {len(partitions)}"
+        }
+
+    except Exception as e:
+        logger.error(f"Ошибка в задаче пересчета стоимости доставки: {e}")
+        raise self.retry(countdown=60, max_retries=3)
+
+
+@shared_task(bind=True, name='reprice_delivery_costs_partition')
+@run_coroutine
+@use_database
+async def reprice_delivery_costs_partition_task(self, job_id: str, usd_rate: float, start_id: int, end_id: int):
+    """Пересчет стоимости доставки для раздела ID [start_id, end_id] с продолжением с контрольной точки"""
+    try:
+        updated_count = await PackageService().reprice_delivery_costs(
+            usd_rate,
+            start_id,
+            end_id,
+            checkpoint_key=f"reprice:{job_id}:{start_id}"
+        )
+
+        return {
+            "status": "success",
+            "updated_packages": updated_count,
+            "message": f"Пересчитано посылок: {updated_count}"
+        }
+
+    except Exception as e:
+        logger.error(f"Ошибка при пересчете раздела {start_id}-{end_id}: {e}")
+        raise self.retry(countdown=30, max_retries=5)
@@ -45,3 +45,33 @@ def transport_company_data():
     """Тестовые данные для привязки транспортной компании"""
 
     return {"company_id": 42}
+
+
+@pytest.fixture
+def fake_cache(mocker):
+    """Подменяет Redis-кэш словарем в памяти; возвращает этот словарь"""
+    from app.core.cache import Cache
+
+    data = {}
+
+    async def get(self, key):
+        return data.get(key)
+
+    async def set(self, key, value, expire_seconds=None):
+        data[key] = value
+        return True
+
+    async def add(self, key, value, expire_seconds=None):
+        if key in data:
+            return False
+        data[key] = value
+        return True
+
+    async def delete(self, key):
+        return data.pop(key, None) is not None
+
+    mocker.patch.object(Cache, 'get', get)
+    mocker.patch.object(Cache, 'set', set)
+    mocker.patch.object(Cache, 'add', add)
+    mocker.patch.object(Cache, 'delete', delete)
+    return data
@@ -48,6 +48,31 @@ class TestAdminEndpoints:
         data = response.json()
         assert data["status"] == "PENDING"
 
+    @pytest.mark.asyncio
+    async def test_get_tasks_status_batch(self, async_client):
+        """Тест получения статусов нескольких задач одним запросом"""
+        create_task_response = await async_client.post("/backend/api/admin/calculate-delivery-costs")
+        assert create_task_response.status_code == 202
+        task_id = create_task_response.json()["task_id"]
+        fake_task_id = "invalid-task-id-12345"
+
+        response = await async_client.get(
+            "/backend/api/admin/tasks/status",
+            params=[("task_ids", task_id), ("task_ids", fake_task_id)]
+        )
+        assert response.status_code == 200
+
+        tasks = response.json()["tasks"]
+        assert [task["task_id"] for task in tasks] == [task_id, fake_task_id]
+        assert tasks[0]["status"] in ["PENDING", "STARTED", "SUCCESS", "FAILURE", "RETRY"]
+        assert tasks[1]["status"] == "PENDING"
+
+    @pytest.mark.asyncio
+    async def test_get_tasks_status_requires_ids(self, async_client):
+        """Тест: без ID задач запрос отклоняется"""
+        response = await async_client.get("/backend/api/admin/tasks/status")
+        assert response.status_code == 422
+
     @pytest.mark.asyncio
     async def test_concurrent_assignment_not_found(self, async_client):
         """Тест конкурентной привязки для несуществующей посылки"""
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.core.cache import Cache, LocalCache
+
+
+class TestLocalCache:
+    """Тесты in-process уровня кэша"""
+
+    def test_evicts_least_recently_used(self):
+        """Тест: при переполнении вытесняется давно не использованный ключ"""
+
+        cache = LocalCache(max_size=2, ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1  # 'a' становится недавно использованным
+
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+
+    def test_expires_after_ttl(self):
+        """Тест: значение устаревает по TTL, а TTL ключа не превышает TTL уровня"""
+
+        cache = LocalCache(max_size=10, ttl_seconds=0.05)
+        cache.set('short', 1, ttl_seconds=0.01)
+        cache.set('capped', 2, ttl_seconds=3600)
+
+        time.sleep(0.02)
+        assert cache.get('short') is None
+        assert cache.get('capped') == 2
+
+        time.sleep(0.05)
+        assert cache.get('capped') is None
+
+
+class TestCacheGetOrSet:
+    """Тесты загрузки значения при промахе кэша"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_call_loader_once(self, fake_cache):
+        """Тест: одновременные промахи по ключу ждут единственный вызов loader"""
+
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'value': 42}
+
+        key = f'test:get_or_set:{uuid.uuid4().hex}'
+        values = await asyncio.gather(*(Cache().get_or_set(key, loader, 60) for _ in range(10)))
+
+        assert len(calls) == 1
+        assert values == [{'value': 42}] * 10
+        assert fake_cache[key] == {'value': 42}
+
+        # Следующий вызов берет значение из кэша
+        assert await Cache().get_or_set(key, loader) == {'value': 42}
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_loader_error_reaches_all_waiters(self, fake_cache):
+        """Тест: ошибка loader получают все ожидающие, а следующий промах загружает заново"""
+
+        calls = []
+
+        async def failing_loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError('loader failed')
+
+        key = f'test:get_or_set:{uuid.uuid4().hex}'
+        results = await asyncio.gather(
+            *(Cache().get_or_set(key, failing_loader) for _ in range(3)), return_exceptions=True
+        )
+
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert key not in fake_cache
+
+        async def loader():
+            return 1
+
+        assert await Cache().get_or_set(key, loader) == 1
+
+
+class TestCacheInvalidation:
+    """Тесты сброса локальных копий через Redis pub/sub"""
+
+    @staticmethod
+    def _new_cache() -> Cache:
+        """Отдельный экземпляр Cache в обход Singleton — как кэш другого процесса"""
+
+        cache = Cache.__new__(Cache)
+        cache.__init__()
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_change_in_other_process_drops_local_copy(self):
+        """Тест: изменение ключа одним процессом сбрасывает локальную копию в другом"""
+
+        writer, reader = self._new_cache(), self._new_cache()
+        if reader._local is None:
+            pytest.skip("In-process уровень кэша отключен (CACHE_LOCAL_MAX_SIZE=0)")
+
+        key = f'test:invalidation:{uuid.uuid4().hex}'
+        try:
+            await writer.set(key, 1)
+
+            # Промах локального уровня запускает подписку; ждем ее, пока подписка очищает уровень
+            assert await reader.get(key) == 1
+            await asyncio.sleep(0.5)
+            assert await reader.get(key) == 1
+            assert reader._local.get(key) == 1
+
+            await writer.set(key, 2)
+
+            for _ in range(50):
+                if reader._local.get(key) is None:
+                    break
+                await asyncio.sleep(0.05)
+
+            assert reader._local.get(key) is None
+            assert await reader.get(key) == 2
+        finally:
+            await writer.delete(key)
+            await writer.close()
+            await reader.close()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from app.business.currency_service import CurrencyService
+from app.core.celery_client import CeleryTaskGateway
+
+
+@pytest.fixture
+def currency_service(fake_cache, mocker):
+    """Отдельный экземпляр сервиса (в обход Singleton) без обращений к API ЦБ и Celery"""
+
+    service = CurrencyService.__new__(CurrencyService)
+    service.__init__()
+    mocker.patch.object(service, '_fetch_rate_from_api', mocker.AsyncMock(return_value=95.0))
+    mocker.patch.object(CeleryTaskGateway, 'send_task', mocker.AsyncMock(return_value='task-id'))
+    return service
+
+
+class TestCurrencyService:
+    """Тесты получения курса в режиме stale-while-revalidate"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_rate_is_served_from_cache(self, currency_service, fake_cache):
+        """Тест: свежий курс отдается из кэша без запроса к API"""
+
+        fake_cache[CurrencyService.CACHE_KEY] = {'rate': 90.0, 'fetched_at': time.time() - 10}
+
+        assert await currency_service.get_usd_to_rub_rate() == 90.0
+        assert currency_service._refresh_task is None
+        currency_service._fetch_rate_from_api.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_refresh_ahead_serves_current_rate(self, currency_service, fake_cache):
+        """Тест: через REFRESH_AHEAD_SECONDS курс отдается сразу, а обновление идет в фоне"""
+
+        fetched_at = time.time() - CurrencyService.REFRESH_AHEAD_SECONDS - 1
+        fake_cache[CurrencyService.CACHE_KEY] = {'rate': 90.0, 'fetched_at': fetched_at}
+        fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY] = {'rate': 90.0, 'fetched_at': fetched_at}
+
+        assert await currency_service.get_usd_to_rub_rate() == 90.0
+
+        assert currency_service._refresh_task is not None
+        await currency_service._refresh_task
+        currency_service._fetch_rate_from_api.assert_awaited_once()
+        assert fake_cache[CurrencyService.CACHE_KEY]['rate'] == 95.0
+        assert fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY]['rate'] == 95.0
+        assert CurrencyService.REFRESH_LOCK_KEY not in fake_cache
+
+        # Повторное обращение сразу после обновления не запускает новое
+        assert await currency_service.get_usd_to_rub_rate() == 95.0
+        currency_service._fetch_rate_from_api.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_rate_is_served_while_revalidating(self, currency_service, fake_cache):
+        """Тест: после истечения кэша отдается последний успешный курс, не дожидаясь API"""
+
+        fetched_at = time.time() - CurrencyService.CACHE_EXPIRE_SECONDS - 1
+        fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY] = {'rate': 90.0, 'fetched_at': fetched_at}
+
+        assert await currency_service.get_usd_to_rub_rate() == 90.0
+        await currency_service._refresh_task
+        assert fake_cache[CurrencyService.CACHE_KEY]['rate'] == 95.0
+
+    @pytest.mark.asyncio
+    async def test_last_good_rate_is_used_when_api_fails(self, currency_service, fake_cache):
+        """Тест: при недоступности API используется последний успешный курс"""
+
+        currency_service._fetch_rate_from_api.return_value = None
+        fetched_at = time.time() - CurrencyService.CACHE_EXPIRE_SECONDS - 1
+        fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY] = {'rate': 90.0, 'fetched_at': fetched_at}
+
+        assert await currency_service.get_usd_to_rub_rate() == 90.0
+        assert await currency_service._refresh_task is None
+
+        assert CurrencyService.CACHE_KEY not in fake_cache
+        assert await currency_service.get_usd_to_rub_rate() == 90.0
+        assert await currency_service.get_cached_usd_to_rub_rate() is None
+
+    @pytest.mark.asyncio
+    async def test_cold_start_fetches_rate(self, currency_service, fake_cache):
+        """Тест: при холодном старте курс запрашивается из API и сохраняется"""
+
+        assert await currency_service.get_usd_to_rub_rate() == 95.0
+        assert fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY]['rate'] == 95.0
+
+    @pytest.mark.asyncio
+    async def test_cold_start_waits_for_other_process(self, currency_service, fake_cache, mocker):
+        """Тест: если обновление с блокировкой выполняет другой процесс, холодный старт ждет его курс"""
+
+        mocker.patch.object(CurrencyService, 'LOCK_WAIT_INTERVAL_SECONDS', 0.01)
+        fake_cache[CurrencyService.REFRESH_LOCK_KEY] = 1
+        currency_service._start_refresh(use_lock=True)
+
+        asyncio.get_running_loop().call_later(
+            0.05, fake_cache.__setitem__, CurrencyService.CACHE_KEY, {'rate': 93.0, 'fetched_at': time.time()}
+        )
+
+        assert await currency_service.get_usd_to_rub_rate() == 93.0
+        currency_service._fetch_rate_from_api.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_cold_start_fetches_rate_once(self, currency_service, fake_cache, mocker):
+        """Тест: одновременные запросы курса при холодном старте ждут один запрос к API"""
+
+        async def fetch_rate():
+            await asyncio.sleep(0.01)
+            return 95.0
+
+        currency_service._fetch_rate_from_api.side_effect = fetch_rate
+
+        rates = await asyncio.gather(*(currency_service.get_usd_to_rub_rate() for _ in range(10)))
+
+        assert rates == [95.0] * 10
+        currency_service._fetch_rate_from_api.assert_awaited_once()
@@ -0,0 +1,115 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.core.database import get_db_session_manager
+from app.middleware.database import DatabaseMiddleware, PRIMARY_STICKY_COOKIE_NAME
+
+
+class FakeSession:
+    """Сессия БД, записывающая коммиты, откаты и закрытия в общий журнал"""
+
+    def __init__(self, journal: list, name: str):
+        self.journal = journal
+        self.name = name
+
+    async def commit(self):
+        self.journal.append(('commit', self.name))
+
+    async def rollback(self):
+        self.journal.append(('rollback', self.name))
+
+    async def close(self):
+        self.journal.append(('close', self.name))
+
+
+async def write(request):
+    get_db_session_manager().session
+    return Response(status_code=int(request.query_params.get('status', 200)))
+
+
+async def fail(request):
+    get_db_session_manager().session
+    raise RuntimeError('handler failed')
+
+
+async def read(request):
+    return JSONResponse({'session': get_db_session_manager().read_session.name})
+
+
+@pytest.fixture
+def journal(mocker):
+    """Журнал операций сессий; реплики включены, сессии БД подменены FakeSession"""
+
+    journal = []
+    mocker.patch('app.middleware.database.DATABASE_REPLICA_URLS', ('mysql+aiomysql://replica/db',))
+    mocker.patch('app.core.database.manager.get_session', lambda: FakeSession(journal, 'primary'))
+    mocker.patch('app.core.database.manager.get_replica_session', lambda: FakeSession(journal, 'replica'))
+    return journal
+
+
+@pytest_asyncio.fixture
+async def client(journal):
+    """HTTP клиент приложения из трех маршрутов, обернутого в DatabaseMiddleware"""
+
+    app = DatabaseMiddleware(Starlette(routes=[
+        Route('/write', write, methods=['POST']),
+        Route('/fail', fail, methods=['POST']),
+        Route('/read', read, methods=['GET']),
+    ]))
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+class TestDatabaseMiddleware:
+    """Тесты middleware управления сессиями БД"""
+
+    @pytest.mark.asyncio
+    async def test_successful_write_commits_and_sets_primary_cookie(self, client, journal):
+        """Тест: успешная запись фиксируется и выставляет cookie db_primary"""
+
+        response = await client.post('/write')
+
+        assert response.status_code == 200
+        assert journal == [('commit', 'primary'), ('close', 'primary')]
+        assert PRIMARY_STICKY_COOKIE_NAME in response.cookies
+
+    @pytest.mark.asyncio
+    async def test_handler_error_rolls_back(self, client, journal):
+        """Тест: исключение обработчика откатывает транзакцию и не выставляет cookie"""
+
+        response = await client.post('/fail')
+
+        assert response.status_code == 500
+        assert ('rollback', 'primary') in journal
+        assert ('commit', 'primary') not in journal
+        assert journal[-1] == ('close', 'primary')
+        assert PRIMARY_STICKY_COOKIE_NAME not in response.cookies
+
+    @pytest.mark.asyncio
+    async def test_error_response_rolls_back(self, client, journal):
+        """Тест: ответ не 2xx откатывает транзакцию и не выставляет cookie"""
+
+        response = await client.post('/write?status=400')
+
+        assert response.status_code == 400
+        assert journal == [('rollback', 'primary'), ('close', 'primary')]
+        assert PRIMARY_STICKY_COOKIE_NAME not in response.cookies
+
+    @pytest.mark.asyncio
+    async def test_reads_after_write_use_primary(self, client, journal):
+        """Тест: чтения идут на реплику, а после записи с cookie db_primary — в основную БД"""
+
+        response = await client.get('/read')
+        assert response.json() == {'session': 'replica'}
+        assert PRIMARY_STICKY_COOKIE_NAME not in response.cookies
+
+        response = await client.post('/write')
+        assert PRIMARY_STICKY_COOKIE_NAME in client.cookies
+
+        response = await client.get('/read')
+        assert response.json() == {'session': 'primary'}
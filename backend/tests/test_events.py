@@ -0,0 +1,31 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.events import EventBus
+
+
+class TestEventBus:
+    """Тесты шины событий сессий"""
+
+    @pytest.mark.asyncio
+    async def test_listener_receives_only_own_session_events(self):
+        """Тест: подписчик получает события своей сессии и не получает чужие"""
+        session_id = f"test-{uuid.uuid4().hex}"
+        other_session_id = f"test-{uuid.uuid4().hex}"
+
+        events = EventBus().listen(session_id, idle_timeout=5)
+        try:
+            # Первая итерация регистрирует подписчика; даем подписке процесса подключиться
+            first_event = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0.5)
+
+            await EventBus().publish(other_session_id, "package_created", {"package_ids": [1]})
+            await EventBus().publish(session_id, "package_priced", {"package_ids": [2, 3]})
+
+            event = await asyncio.wait_for(first_event, timeout=5)
+            assert event["type"] == "package_priced"
+            assert event["data"] == {"package_ids": [2, 3]}
+        finally:
+            await events.aclose()
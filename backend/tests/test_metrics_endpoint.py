@@ -0,0 +1,78 @@
+import pytest
+
+
+class TestMetricsEndpoint:
+    """Тесты для эндпоинта метрик"""
+
+    @pytest.mark.asyncio
+    async def test_metrics_use_route_template(self, async_client):
+        """Тест: метрики HTTP и SQL размечаются шаблоном маршрута, а не фактическим путем"""
+        response = await async_client.get("/backend/api/packages/999999")
+        assert response.status_code == 404
+
+        response = await async_client.get("/backend/api/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        text = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        assert '/packages/{package_id}"' in text
+        assert "/packages/999999" not in text
+        assert 'status="404"' in text
+        assert "db_queries_total" in text
+        assert "http_request_db_queries_bucket" in text
+
+
+class FakeRedisHashes:
+    """Hash-значения Redis в памяти: pipeline с HINCRBY/HINCRBYFLOAT и HGETALL"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(float(values.get(field, 0)) + amount)
+
+    async def execute(self):
+        return []
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+class TestSharedHistogram:
+    """Тесты гистограммы, общей для всех процессов"""
+
+    @pytest.mark.asyncio
+    async def test_observations_are_exported(self, async_client, mocker):
+        """Тест: наблюдения observe_many и observe_async попадают в вывод /metrics"""
+        from app.core.metrics import SharedHistogram, RABBITMQ_CONSUMER_LAG_SECONDS
+
+        redis = FakeRedisHashes()
+        mocker.patch.object(SharedHistogram, '_redis', return_value=redis)
+
+        await RABBITMQ_CONSUMER_LAG_SECONDS.observe_many((0.001, 0.002, 20.0), 'registration')
+        await RABBITMQ_CONSUMER_LAG_SECONDS.observe_async(0.002, 'registration')
+
+        response = await async_client.get("/backend/api/metrics")
+        assert response.status_code == 200
+
+        text = response.text
+        assert "# TYPE rabbitmq_consumer_lag_seconds histogram" in text
+        assert 'rabbitmq_consumer_lag_seconds_bucket{queue="registration",le="0.01"} 3' in text
+        assert 'rabbitmq_consumer_lag_seconds_bucket{queue="registration",le="+Inf"} 4' in text
+        assert 'rabbitmq_consumer_lag_seconds_count{queue="registration"} 4' in text
+        assert 'rabbitmq_consumer_lag_seconds_sum{queue="registration"} 20.005' in text
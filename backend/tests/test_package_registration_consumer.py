@@ -0,0 +1,173 @@
+import pytest
+
+from app.business import PackageRegistrationConsumer, PackageService, PackageTypeRegistry
+from app.core import DBSessionManager
+from app.core.metrics import RABBITMQ_CONSUMER_LAG_SECONDS
+
+
+class FakeMessage:
+    """Сообщение RabbitMQ, записывающее подтверждения в общий журнал"""
+
+    def __init__(self, journal: list, name: str):
+        self.journal = journal
+        self.name = name
+        self.headers = {}
+        self.processed = False
+
+    async def ack(self):
+        self.processed = True
+        self.journal.append(('ack', self.name))
+
+    async def reject(self, requeue: bool = False):
+        self.processed = True
+        self.journal.append(('reject', self.name, requeue))
+
+    async def nack(self, requeue: bool = True):
+        self.processed = True
+        self.journal.append(('nack', self.name, requeue))
+
+
+def registration_message(name: str, package_type_id: int = 1) -> dict:
+    return {
+        'type': 'package_registration',
+        'session_id': f'session-{name}',
+        'package_data': {
+            'name': name,
+            'weight': 1.0,
+            'package_type_id': package_type_id,
+            'content_cost_usd': 10.0,
+        },
+    }
+
+
+@pytest.fixture
+def journal(mocker):
+    """Журнал вызовов: вставка, коммит и подтверждения сообщений в порядке выполнения"""
+
+    journal = []
+
+    async def create_packages(packages, calculate_cost=False):
+        journal.append(('create', [data.name for data, _ in packages]))
+        return list(range(1, len(packages) + 1))
+
+    async def commit(self):
+        journal.append(('commit',))
+
+    mocker.patch.object(PackageTypeRegistry, 'get_ids', mocker.AsyncMock(return_value={1}))
+    mocker.patch.object(PackageService, 'create_packages', mocker.AsyncMock(side_effect=create_packages))
+    mocker.patch.object(PackageService, 'publish_packages_event', mocker.AsyncMock())
+    mocker.patch.object(DBSessionManager, 'commit', commit)
+    mocker.patch.object(RABBITMQ_CONSUMER_LAG_SECONDS, 'observe_many', mocker.AsyncMock())
+    return journal
+
+
+class TestPackageRegistrationConsumer:
+    """Тесты потребителя очереди регистрации посылок"""
+
+    @pytest.mark.asyncio
+    async def test_messages_are_processed_in_batches(self, journal):
+        """Тест: пачка обрабатывается одной вставкой, когда набирается batch_size сообщений"""
+
+        consumer = PackageRegistrationConsumer(batch_size=2)
+
+        await consumer._on_message(registration_message('first'), FakeMessage(journal, 'first'))
+        assert journal == []
+
+        await consumer._on_message(registration_message('second'), FakeMessage(journal, 'second'))
+        assert journal == [
+            ('create', ['first', 'second']),
+            ('commit',),
+            ('ack', 'first'),
+            ('ack', 'second'),
+        ]
+        PackageService.publish_packages_event.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalid_messages_are_rejected(self, journal):
+        """Тест: невалидные сообщения отбрасываются без повтора, валидные создаются"""
+
+        consumer = PackageRegistrationConsumer(batch_size=10)
+
+        await consumer._on_message(registration_message('valid'), FakeMessage(journal, 'valid'))
+        await consumer._on_message(
+            registration_message('unknown_type', package_type_id=99999), FakeMessage(journal, 'unknown_type')
+        )
+        await consumer._on_message({'type': 'other'}, FakeMessage(journal, 'wrong_type'))
+        await consumer._on_message(
+            {**registration_message('no_session'), 'session_id': None}, FakeMessage(journal, 'no_session')
+        )
+        await consumer._flush()
+
+        assert ('reject', 'unknown_type', False) in journal
+        assert ('reject', 'wrong_type', False) in journal
+        assert ('reject', 'no_session', False) in journal
+        assert ('create', ['valid']) in journal
+        assert ('ack', 'valid') in journal
+
+    @pytest.mark.asyncio
+    async def test_messages_are_acked_only_after_commit(self, journal, mocker):
+        """Тест: при ошибке коммита сообщения возвращаются в очередь, а не подтверждаются"""
+
+        async def failing_commit(self):
+            journal.append(('commit',))
+            raise RuntimeError('commit failed')
+
+        mocker.patch.object(DBSessionManager, 'commit', failing_commit)
+
+        consumer = PackageRegistrationConsumer(batch_size=2)
+        await consumer._on_message(registration_message('first'), FakeMessage(journal, 'first'))
+        await consumer._on_message(registration_message('second'), FakeMessage(journal, 'second'))
+
+        assert not [entry for entry in journal if entry[0] == 'ack']
+        assert ('nack', 'first', True) in journal
+        assert ('nack', 'second', True) in journal
+        PackageService.publish_packages_event.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_message_rejected_by_db_is_dropped_alone(self, journal, mocker):
+        """Тест: если БД не принимает одну посылку, отбрасывается только ее сообщение, остальные создаются"""
+        from sqlalchemy.exc import DataError
+
+        async def create_packages(packages, calculate_cost=False):
+            names = [data.name for data, _ in packages]
+            journal.append(('create', names))
+            if 'out_of_range' in names:
+                raise DataError('INSERT INTO packages', {}, Exception('Out of range value'))
+            return list(range(1, len(packages) + 1))
+
+        mocker.patch.object(PackageService, 'create_packages', mocker.AsyncMock(side_effect=create_packages))
+
+        consumer = PackageRegistrationConsumer(batch_size=3)
+        for name in ('first', 'out_of_range', 'second'):
+            await consumer._on_message(registration_message(name), FakeMessage(journal, name))
+
+        assert journal[0] == ('create', ['first', 'out_of_range', 'second'])
+        assert ('ack', 'first') in journal
+        assert ('ack', 'second') in journal
+        assert ('reject', 'out_of_range', False) in journal
+        assert not [entry for entry in journal if entry[0] == 'nack']
+
+    @pytest.mark.asyncio
+    async def test_batch_requeued_when_db_unavailable_during_retry(self, journal, mocker):
+        """Тест: если при повторе по одной БД недоступна, необработанные сообщения возвращаются в очередь"""
+        from sqlalchemy.exc import IntegrityError, OperationalError
+
+        async def create_packages(packages, calculate_cost=False):
+            names = [data.name for data, _ in packages]
+            journal.append(('create', names))
+            if len(names) > 1:
+                raise IntegrityError('INSERT INTO packages', {}, Exception('foreign key constraint fails'))
+            if names == ['second']:
+                raise OperationalError('INSERT INTO packages', {}, Exception('Lost connection'))
+            return [1]
+
+        mocker.patch.object(PackageService, 'create_packages', mocker.AsyncMock(side_effect=create_packages))
+
+        consumer = PackageRegistrationConsumer(batch_size=3)
+        for name in ('first', 'second', 'third'):
+            await consumer._on_message(registration_message(name), FakeMessage(journal, name))
+
+        assert ('ack', 'first') in journal
+        assert ('nack', 'second', True) in journal
+        assert ('nack', 'third', True) in journal
+        assert not [entry for entry in journal if entry[0] == 'reject']
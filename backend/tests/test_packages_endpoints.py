@@ -33,6 +33,19 @@ class TestPackageTypesEndpoint:
             assert isinstance(package_type["id"], int)
             assert isinstance(package_type["name"], str)
 
+    @pytest.mark.asyncio
+    async def test_get_package_types_not_modified(self, async_client):
+        """Тест: при совпадении If-None-Match типы посылок не передаются повторно"""
+
+        response = await async_client.get("/backend/api/package-types/")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await async_client.get("/backend/api/package-types/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
 
 class TestPackagesEndpoint:
     """Тесты для эндпоинтов посылок"""
@@ -125,3 +138,227 @@ class TestPackagesEndpoint:
             json=transport_company_data
         )
         assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_get_packages_list_cursor_pagination(self, async_client, sample_package_data):
+        """Тест keyset-пагинации списка посылок по курсору"""
+
+        for _ in range(3):
+            response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+            assert response.status_code == 200
+
+        first_page = await async_client.get("/backend/api/packages/?size=2&include_total=false")
+        assert first_page.status_code == 200
+
+        first_data = first_page.json()
+        assert first_data["total"] is None
+        assert first_data["pages"] is None
+        assert len(first_data["items"]) == 2
+        assert first_data["next_cursor"]
+
+        second_page = await async_client.get(
+            f"/backend/api/packages/?size=2&include_total=false&cursor={first_data['next_cursor']}"
+        )
+        assert second_page.status_code == 200
+
+        first_ids = {item["id"] for item in first_data["items"]}
+        second_ids = {item["id"] for item in second_page.json()["items"]}
+        assert second_ids
+        assert not first_ids & second_ids
+
+    @pytest.mark.asyncio
+    async def test_get_packages_list_invalid_cursor(self, async_client):
+        """Тест получения списка посылок с невалидным курсором"""
+
+        response = await async_client.get("/backend/api/packages/?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_create_packages_bulk_success(self, async_client, sample_package_data):
+        """Тест пакетного создания посылок"""
+
+        response = await async_client.post(
+            "/backend/api/packages/bulk",
+            json=[sample_package_data, sample_package_data, sample_package_data]
+        )
+        assert response.status_code == 200
+
+        ids = response.json()["ids"]
+        assert len(ids) == 3
+        assert len(set(ids)) == 3
+
+        detail_response = await async_client.get(f"/backend/api/packages/{ids[-1]}")
+        assert detail_response.status_code == 200
+        assert detail_response.json()["name"] == sample_package_data["name"]
+
+    @pytest.mark.asyncio
+    async def test_create_packages_bulk_concurrent(self, async_client, sample_package_data):
+        """Тест: параллельные пакетные вставки получают ID только своих посылок"""
+        import asyncio
+
+        names = [f"Пачка {batch}" for batch in range(4)]
+        responses = await asyncio.gather(*(
+            async_client.post("/backend/api/packages/bulk", json=[{**sample_package_data, "name": name}] * 20)
+            for name in names
+        ))
+
+        for name, response in zip(names, responses):
+            assert response.status_code == 200
+            ids = response.json()["ids"]
+            assert len(ids) == 20
+            assert ids == sorted(ids)
+
+            for package_id in (ids[0], ids[-1]):
+                detail_response = await async_client.get(f"/backend/api/packages/{package_id}")
+                assert detail_response.json()["name"] == name
+
+    @pytest.mark.asyncio
+    async def test_create_packages_bulk_unknown_type(self, async_client, sample_package_data):
+        """Тест пакетного создания посылок с несуществующим типом"""
+
+        response = await async_client.post(
+            "/backend/api/packages/bulk",
+            json=[sample_package_data, {**sample_package_data, "package_type_id": 99999}]
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_create_packages_bulk_empty(self, async_client):
+        """Тест пакетного создания с пустым списком"""
+
+        response = await async_client.post("/backend/api/packages/bulk", json=[])
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_assign_transport_company_conflict(self, async_client, sample_package_data):
+        """Тест повторной привязки посылки другой транспортной компанией"""
+
+        create_response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+        assert create_response.status_code == 200
+        package_id = create_response.json()["id"]
+
+        first_response = await async_client.post(
+            f"/backend/api/packages/{package_id}/assign-transport", json={"company_id": 42}
+        )
+        assert first_response.status_code == 200
+
+        conflict_response = await async_client.post(
+            f"/backend/api/packages/{package_id}/assign-transport", json={"company_id": 43}
+        )
+        assert conflict_response.status_code == 409
+
+        repeat_response = await async_client.post(
+            f"/backend/api/packages/{package_id}/assign-transport", json={"company_id": 42}
+        )
+        assert repeat_response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_create_package_priced_with_cached_rate(self, async_client, sample_package_data, mocker):
+        """Тест: при наличии курса в кэше стоимость доставки рассчитывается сразу при создании"""
+        from app.business import CurrencyService, PackageService
+
+        mocker.patch.object(CurrencyService, 'get_cached_usd_to_rub_rate', mocker.AsyncMock(return_value=90.0))
+
+        response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+        assert response.status_code == 200
+        assert response.json()["delivery_cost_rub"] == PackageService.compute_delivery_cost(
+            sample_package_data["weight"], sample_package_data["content_cost_usd"], 90.0
+        )
+
+    @pytest.mark.asyncio
+    async def test_create_package_without_cached_rate(self, async_client, sample_package_data, mocker):
+        """Тест: без курса в кэше посылка создается без стоимости, ее оценит периодическая задача"""
+        from app.business import CurrencyService
+
+        mocker.patch.object(CurrencyService, 'get_cached_usd_to_rub_rate', mocker.AsyncMock(return_value=None))
+
+        response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+        assert response.status_code == 200
+        assert response.json()["delivery_cost_rub"] is None
+
+    @pytest.mark.asyncio
+    async def test_create_package_single_insert(self, async_client, sample_package_data):
+        """Тест: создание посылки — один INSERT и COMMIT, без чтения типа и refresh"""
+        from sqlalchemy import event
+
+        from app.business import PackageTypeRegistry
+        from app.core.database.engine import get_engine
+
+        # Справочник типов загружается заранее, как при старте приложения
+        await PackageTypeRegistry().load()
+
+        statements = []
+        commits = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def on_commit(conn):
+            commits.append(conn)
+
+        sync_engine = get_engine().sync_engine
+        event.listen(sync_engine, 'before_cursor_execute', on_execute)
+        event.listen(sync_engine, 'commit', on_commit)
+        try:
+            response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+        finally:
+            event.remove(sync_engine, 'before_cursor_execute', on_execute)
+            event.remove(sync_engine, 'commit', on_commit)
+
+        assert response.status_code == 200
+        assert response.json()["created_at"] is not None
+        assert len(statements) == 1
+        assert statements[0].lstrip().upper().startswith("INSERT INTO PACKAGES")
+        assert len(commits) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_package_by_id_response_shape(self, async_client, sample_package_data):
+        """Тест: детальный ответ содержит все поля PackageDetailResponse и тип посылки"""
+
+        response = await async_client.post("/backend/api/packages/", json=sample_package_data)
+        assert response.status_code == 200
+        package_id = response.json()["id"]
+
+        detail_response = await async_client.get(f"/backend/api/packages/{package_id}")
+        assert detail_response.status_code == 200
+        assert detail_response.headers["content-type"] == "application/json"
+
+        data = detail_response.json()
+        assert set(data) == {
+            "id", "name", "weight", "package_type_id", "content_cost_usd", "delivery_cost_rub",
+            "transport_company_id", "created_at", "updated_at", "package_type"
+        }
+        assert data["package_type"]["id"] == sample_package_data["package_type_id"]
+        assert isinstance(data["package_type"]["name"], str)
+
+    @pytest.mark.asyncio
+    async def test_export_packages(self, async_client, sample_package_data):
+        """Тест выгрузки всех посылок сессии в NDJSON, CSV и с gzip"""
+        import csv
+        import io
+        import json
+
+        response = await async_client.post(
+            "/backend/api/packages/bulk",
+            json=[sample_package_data, sample_package_data, sample_package_data]
+        )
+        assert response.status_code == 200
+        ids = set(response.json()["ids"])
+
+        ndjson_response = await async_client.get("/backend/api/packages/export?format=ndjson")
+        assert ndjson_response.status_code == 200
+        assert ndjson_response.headers["content-type"] == "application/x-ndjson"
+        items = [json.loads(line) for line in ndjson_response.text.splitlines()]
+        assert ids <= {item["id"] for item in items}
+        assert all(item["package_type"] for item in items)
+
+        csv_response = await async_client.get("/backend/api/packages/export?format=csv&package_type_id=1")
+        assert csv_response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(csv_response.text)))
+        assert ids <= {int(row["id"]) for row in rows}
+        assert all(row["package_type_id"] == "1" for row in rows)
+
+        gzip_response = await async_client.get("/backend/api/packages/export?format=ndjson&gzip=true")
+        assert gzip_response.status_code == 200
+        assert gzip_response.headers["content-encoding"] == "gzip"
+        assert gzip_response.text == ndjson_response.text
@@ -0,0 +1,110 @@
+"""
+Регрессионный тест использования индексов таблицы packages.
+Все запросы, которые PackageService отправляет в БД, перехватываются
+и проверяются через EXPLAIN: ни один не должен приводить к полному сканированию.
+Новый запрос сервиса нужно добавить в тест.
+"""
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from app.business.currency_service import CurrencyService
+from app.business.package_service import PackageService
+from app.core import get_db_session_manager
+from app.core.database.engine import get_engine
+from app.schemas import PackageCreate, PackageFilter
+from app.utils import decode_cursor, encode_cursor
+
+
+@pytest_asyncio.fixture
+async def captured_statements():
+    """Собирает SQL-запросы к таблице packages, выполненные во время теста"""
+
+    sync_engine = get_engine().sync_engine
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        normalized = statement.lstrip().upper()
+        if 'PACKAGES' in normalized and normalized.startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    event.listen(sync_engine, 'before_cursor_execute', _capture)
+    yield statements
+    event.remove(sync_engine, 'before_cursor_execute', _capture)
+
+
+async def explain(statement: str, parameters) -> list[dict]:
+    """Выполняет EXPLAIN для запроса с теми же параметрами"""
+
+    async with get_engine().connect() as conn:
+        result = await conn.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+        return [dict(row._mapping) for row in result]
+
+
+class TestPackagesIndexes:
+    """Тесты использования индексов запросами PackageService"""
+
+    @pytest.mark.asyncio
+    async def test_package_service_queries_use_indexes(self, captured_statements, mocker):
+        """
+        Тест отсутствия полного сканирования packages в запросах сервиса.
+        Все выполняется в одной транзакции, которая откатывается в конце. Методы, коммитящие
+        по пачкам (calculate_delivery_costs, reprice_delivery_costs), не вызываются: их запросы
+        выполняются напрямую теми же построителями, которые используют эти методы.
+        """
+
+        mocker.patch.object(CurrencyService, 'get_cached_usd_to_rub_rate', mocker.AsyncMock(return_value=None))
+
+        session_id = str(uuid.uuid4())
+        package_data = PackageCreate(
+            name='Посылка для проверки индексов',
+            weight=1.5,
+            package_type_id=1,
+            content_cost_usd=100.0
+        )
+
+        db_session_manager = get_db_session_manager()
+        try:
+            package = await PackageService().create_package(package_data, session_id)
+            bulk_ids = await PackageService().create_packages([(package_data, session_id)] * 2)
+
+            await PackageService().get_user_packages(session_id)
+            await PackageService().get_user_packages(
+                session_id, filters=PackageFilter(package_type_id=1)
+            )
+            await PackageService().get_user_packages(
+                session_id, filters=PackageFilter(has_delivery_cost=False), include_total=False
+            )
+            await PackageService().get_user_packages(
+                session_id, cursor=decode_cursor(encode_cursor(package.created_at, package.id))
+            )
+            await PackageService().get_package_by_id(package.id, session_id)
+            await PackageService().assign_transport_company(package.id, session_id, 42)
+            await PackageService().get_package_id_range()
+
+            # Выгрузка читает отдельной сессией и видит только зафиксированные посылки
+            async for _ in PackageService().stream_user_packages(
+                session_id, filters=PackageFilter(package_type_id=1, has_delivery_cost=False)
+            ):
+                pass
+
+            session = db_session_manager.session
+            await session.execute(PackageService._unpriced_batch_query(0, 1000))
+            await session.execute(PackageService._price_batch_statement(bulk_ids, 90.0))
+            await session.execute(PackageService._reprice_chunk_statement(bulk_ids[0] - 1, bulk_ids[-1], 91.0))
+        finally:
+            await db_session_manager.rollback()
+            await db_session_manager.close()
+
+        statements = list(captured_statements)
+        assert statements
+
+        full_scans = []
+        for statement, parameters in statements:
+            for row in await explain(statement, parameters):
+                if row.get('table') == 'packages' and row.get('type') == 'ALL':
+                    full_scans.append(statement)
+
+        assert not full_scans, f"Полное сканирование packages в запросах: {full_scans}"
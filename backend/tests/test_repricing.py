@@ -0,0 +1,147 @@
+import time
+
+import pytest
+
+from app.business import CurrencyService, PackageService
+from app.core import DBSessionManager
+from app.core.celery_client import CeleryTaskGateway
+
+
+@pytest.fixture
+def reprice_chunks(fake_cache, mocker):
+    """
+    Подменяет сессию БД: UPDATE отрезков не выполняются, а их границы (last_id, chunk_end_id)
+    записываются в возвращаемый список; каждый отрезок «обновляет» одну посылку.
+    """
+
+    chunks = []
+
+    def reprice_chunk_statement(last_id, chunk_end_id, usd_rate):
+        chunks.append((last_id, chunk_end_id))
+        return None
+
+    session = mocker.Mock()
+    session.execute = mocker.AsyncMock(return_value=mocker.Mock(rowcount=1))
+
+    mocker.patch.object(PackageService, '_reprice_chunk_statement', side_effect=reprice_chunk_statement)
+    mocker.patch.object(DBSessionManager, 'session', new_callable=mocker.PropertyMock, return_value=session)
+    mocker.patch.object(DBSessionManager, 'commit', mocker.AsyncMock())
+    return chunks
+
+
+class TestRepricing:
+    """Тесты пересчета стоимости доставки при смене курса"""
+
+    def test_split_id_range(self):
+        """Тест: диапазон ID делится на непересекающиеся разделы, последний — неполный"""
+
+        assert PackageService.split_id_range(1, 250, 100) == [(1, 100), (101, 200), (201, 250)]
+        assert PackageService.split_id_range(5, 5, 100) == [(5, 5)]
+        assert PackageService.split_id_range(1, 200, 100) == [(1, 100), (101, 200)]
+
+    @pytest.mark.asyncio
+    async def test_reprice_resumes_from_checkpoint(self, reprice_chunks, fake_cache):
+        """Тест: повторный запуск раздела продолжает с сохраненной контрольной точки"""
+
+        checkpoint_key = 'reprice:job-1:1'
+        fake_cache[CurrencyService.REPRICE_RATE_KEY] = 90.0
+        fake_cache[checkpoint_key] = 50
+
+        updated_count = await PackageService().reprice_delivery_costs(
+            90.0, 1, 100, checkpoint_key=checkpoint_key, batch_size=20
+        )
+
+        assert reprice_chunks == [(50, 70), (70, 90), (90, 100)]
+        assert updated_count == 3
+        assert fake_cache[checkpoint_key] == 100
+
+    @pytest.mark.asyncio
+    async def test_reprice_stops_when_rate_changes(self, reprice_chunks, fake_cache, mocker):
+        """Тест: пересчет прекращается, если запущен пересчет по другому курсу"""
+
+        checkpoint_key = 'reprice:job-2:1'
+        fake_cache[CurrencyService.REPRICE_RATE_KEY] = 90.0
+
+        async def commit_and_change_rate(self):
+            fake_cache[CurrencyService.REPRICE_RATE_KEY] = 91.0
+
+        mocker.patch.object(DBSessionManager, 'commit', commit_and_change_rate)
+
+        updated_count = await PackageService().reprice_delivery_costs(
+            90.0, 1, 100, checkpoint_key=checkpoint_key, batch_size=20
+        )
+
+        assert reprice_chunks == [(0, 20)]
+        assert updated_count == 1
+        assert fake_cache[checkpoint_key] == 20
+
+    @pytest.mark.asyncio
+    async def test_return_to_previous_rate_is_repriced(self, fake_cache, mocker):
+        """Тест: смена курса A -> B -> A в пределах часа запускает пересчет оба раза"""
+
+        service = CurrencyService.__new__(CurrencyService)
+        service.__init__()
+        fetch = mocker.patch.object(service, '_fetch_rate_from_api', mocker.AsyncMock())
+        send_task = mocker.patch.object(CeleryTaskGateway, 'send_task', mocker.AsyncMock(return_value='task-id'))
+
+        fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY] = {'rate': 90.0, 'fetched_at': time.time() - 10}
+
+        for rate in (91.0, 90.0, 91.0):
+            fetch.return_value = rate
+            await service._refresh_rate(use_lock=False)
+            # Курсы разных обновлений получены в разное время
+            fake_cache[CurrencyService.LAST_GOOD_CACHE_KEY]['fetched_at'] -= 1
+
+        assert [call.kwargs['kwargs']['usd_rate'] for call in send_task.await_args_list] == [91.0, 90.0, 91.0]
+        assert fake_cache[CurrencyService.REPRICE_RATE_KEY] == 91.0
+
+    def test_price_updates_take_updated_at_from_application_clock(self):
+        """Тест: UPDATE стоимости доставки задают updated_at временем приложения (UTC), а не NOW() MySQL"""
+        from datetime import datetime, timedelta, timezone
+
+        from sqlalchemy.dialects import mysql
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for statement in (
+            PackageService._price_batch_statement([1, 2], 90.0),
+            PackageService._reprice_chunk_statement(0, 100, 90.0),
+        ):
+            updated_at = statement.compile(dialect=mysql.dialect()).params['updated_at']
+            assert abs(updated_at - now) < timedelta(seconds=5)
+
+
+class TestCalculateDeliveryCosts:
+    """Тесты оценки посылок без рассчитанной стоимости доставки"""
+
+    def test_unpriced_batch_is_locked(self):
+        """Тест: пачка выбирается с блокировкой, занятые другим обработчиком посылки пропускаются"""
+        from sqlalchemy.dialects import mysql
+
+        sql = str(PackageService._unpriced_batch_query(0, 100).compile(dialect=mysql.dialect()))
+        assert sql.rstrip().endswith('FOR UPDATE SKIP LOCKED')
+
+    @pytest.mark.asyncio
+    async def test_priced_event_only_for_updated_rows(self, mocker):
+        """Тест: package_priced публикуется для пачки, только если UPDATE обновил все ее посылки"""
+        from collections import namedtuple
+
+        Row = namedtuple('Row', ('id', 'session_id'))
+        first_batch = [Row(1, 'a'), Row(2, 'b')]
+        second_batch = [Row(3, 'a'), Row(4, 'a')]
+
+        session = mocker.Mock()
+        session.execute = mocker.AsyncMock(side_effect=[
+            mocker.Mock(all=mocker.Mock(return_value=first_batch)),
+            mocker.Mock(rowcount=2),
+            mocker.Mock(all=mocker.Mock(return_value=second_batch)),
+            mocker.Mock(rowcount=1),
+            mocker.Mock(all=mocker.Mock(return_value=[])),
+        ])
+        mocker.patch.object(DBSessionManager, 'session', new_callable=mocker.PropertyMock, return_value=session)
+        mocker.patch.object(DBSessionManager, 'commit', mocker.AsyncMock())
+        mocker.patch.object(CurrencyService, 'get_usd_to_rub_rate', mocker.AsyncMock(return_value=90.0))
+        publish = mocker.patch.object(PackageService, 'publish_packages_event', mocker.AsyncMock())
+
+        assert await PackageService().calculate_delivery_costs(batch_size=2) == 3
+
+        publish.assert_awaited_once_with('package_priced', first_batch)